@@ -0,0 +1 @@
+"""Benchmarks for the eMaktab integration (not shipped with HACS)."""
@@ -0,0 +1,187 @@
+"""CPU micro-benchmarks for the eMaktab sensor hot path.
+
+Run from the repository root (Home Assistant must be importable):
+
+    python -m benchmarks.bench_sensor --days 7 28 --lessons 6 12
+
+Each axis given on the command line is swept while the others stay at
+their defaults. Results are written as JSON (one record per benchmark
+and payload size) so runs can be diffed for regressions or plotted as
+scaling curves.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import timeit
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from custom_components.emaktab import sensor
+from custom_components.emaktab.diary import normalize_lessons
+
+from .synthetic import generate_diary
+
+DEFAULTS = {
+    "days": 7,
+    "lessons": 6,
+    "work_marks": 1,
+    "homework_len": 80,
+}
+
+
+def _fake_entry() -> SimpleNamespace:
+    return SimpleNamespace(
+        entry_id="bench",
+        title="Bench",
+        data={"person_id": "1", "school_id": "1"},
+    )
+
+
+def _fake_coordinator(payload: dict[str, Any]) -> SimpleNamespace:
+    return SimpleNamespace(
+        today=datetime.now(timezone.utc).date(),
+        data={
+            "days": payload["days"],
+            "last_update": datetime.now(timezone.utc).isoformat(),
+            "error": None,
+        }
+    )
+
+
+def _cases(payload: dict[str, Any]) -> dict[str, Callable[[], Any]]:
+    """Return benchmark name -> zero-argument callable."""
+    days = payload["days"]
+    today = sensor._select_relevant_day(days) or days[0]
+    coordinator = _fake_coordinator(payload)
+    entry = _fake_entry()
+
+    day_sensor = sensor.EmaktabDaySensor(coordinator, entry)
+    average_sensor = sensor.EmaktabAverageMarkSensor(coordinator, entry)
+    lessons_sensor = sensor.EmaktabLessonsTodaySensor(coordinator)
+    homework_sensor = sensor.EmaktabHomeworkTodaySensor(coordinator)
+    marks_sensor = sensor.EmaktabMarksTodaySensor(coordinator)
+    works_sensor = sensor.EmaktabImportantWorksTodaySensor(coordinator)
+
+    return {
+        "select_relevant_day": lambda: sensor._select_relevant_day(days),
+        "normalize_lessons": lambda: normalize_lessons(today),
+        "day_sensor.attributes": lambda: day_sensor.extra_state_attributes,
+        "day_sensor.state": lambda: day_sensor.state,
+        "average_sensor.attributes": lambda: average_sensor.extra_state_attributes,
+        "average_sensor.state": lambda: average_sensor.state,
+        "lessons_sensor.attributes": lambda: lessons_sensor.extra_state_attributes,
+        "homework_sensor.attributes": lambda: homework_sensor.extra_state_attributes,
+        "marks_sensor.attributes": lambda: marks_sensor.extra_state_attributes,
+        "works_sensor.attributes": lambda: works_sensor.extra_state_attributes,
+    }
+
+
+def _time(func: Callable[[], Any], repeat: int) -> dict[str, float]:
+    """Time a callable, returning per-call statistics in microseconds."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    runs = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "loops": number,
+        "min_us": min(runs),
+        "median_us": statistics.median(runs),
+        "max_us": max(runs),
+    }
+
+
+def _grid(args: argparse.Namespace) -> list[dict[str, int]]:
+    """Build payload parameter sets: one sweep per axis given."""
+    grid: list[dict[str, int]] = [dict(DEFAULTS)]
+
+    for axis in DEFAULTS:
+        for value in getattr(args, axis) or []:
+            params = dict(DEFAULTS)
+            params[axis] = value
+            if params not in grid:
+                grid.append(params)
+
+    return grid
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run all benchmarks and return the report."""
+    results: list[dict[str, Any]] = []
+    only = set(args.only or [])
+
+    for params in _grid(args):
+        payload = generate_diary(
+            days=params["days"],
+            lessons=params["lessons"],
+            work_marks=params["work_marks"],
+            homework_len=params["homework_len"],
+            seed=args.seed,
+        )
+        payload_size = len(json.dumps(payload))
+
+        for name, func in _cases(payload).items():
+            if only and name not in only:
+                continue
+
+            stats = _time(func, args.repeat)
+            results.append(
+                {
+                    "benchmark": name,
+                    "params": params,
+                    "payload_bytes": payload_size,
+                    **stats,
+                }
+            )
+            print(
+                f"{name:<28} {params} {stats['median_us']:10.2f} us",
+                file=sys.stderr,
+            )
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, nargs="*", help="days per payload")
+    parser.add_argument("--lessons", type=int, nargs="*", help="lessons per day")
+    parser.add_argument(
+        "--work-marks",
+        dest="work_marks",
+        type=int,
+        nargs="*",
+        help="workMarks per lesson",
+    )
+    parser.add_argument(
+        "--homework-len",
+        dest="homework_len",
+        type=int,
+        nargs="*",
+        help="homework text length",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", help="benchmark names to run")
+    parser.add_argument("--output", default="bench_output.json")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+
+    print(f"Wrote {len(report['results'])} results to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
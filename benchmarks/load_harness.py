@@ -0,0 +1,509 @@
+"""Scale/load harness for the eMaktab integration.
+
+Runs many EmaktabCoordinator instances (each with its own auth manager,
+API client and sensors) inside a Home Assistant core instance against a
+local stand-in for login.emaktab.uz / emaktab.uz, and reports:
+
+- refresh throughput and latency percentiles
+- time spent per stage: login (auth.py), diary fetch (api.py), attribute
+  build and JSON serialization (sensor.py)
+- event-loop lag measured by a probe task
+- peak memory (tracemalloc peak and max RSS)
+
+Run from the repository root (Home Assistant must be importable):
+
+    python -m benchmarks.load_harness --entries 10 100 500 --rounds 3
+
+One run is made per entry count so the report shows which stage stops
+scaling first. Results are written as JSON.
+
+With `--replay cassette.json` (see benchmarks.record_cassette) every
+client replays a recorded real session instead of talking to the
+stand-in server, and the clock follows the recorded time.
+
+`--scenario NAME` applies a preset from SCENARIOS (explicit options
+still win). `--max-failures N` makes the run exit with status 1 when a
+scenario has more failed refreshes, so a preset can serve as a check:
+
+    python -m benchmarks.load_harness --scenario rate-limit
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import logging
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Iterator
+
+from aiohttp import web
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.json import JSONEncoder
+
+from custom_components.emaktab import api as api_module
+from custom_components.emaktab import auth as auth_module
+from custom_components.emaktab.api import EmaktabApiClient
+from custom_components.emaktab.auth import EmaktabAuthManager
+from custom_components.emaktab.cassette import EmaktabCassette
+from custom_components.emaktab.const import COOKIE_AUTH, COOKIE_SESSION
+from custom_components.emaktab.coordinator import EmaktabCoordinator
+from custom_components.emaktab.ratelimit import EmaktabRateLimiter
+from custom_components.emaktab.sensor import (
+    EmaktabAverageMarkSensor,
+    EmaktabDaySensor,
+)
+
+from .synthetic import generate_diary
+
+_LOGGER = logging.getLogger(__name__)
+
+STAGES = ("refresh", "login", "diary", "attributes", "serialize")
+
+# Presets for --scenario
+SCENARIOS: dict[str, dict[str, Any]] = {
+    # Many children behind the shared limiter: refreshes queue for minutes
+    # but the refresh deadline must not count the queueing
+    "rate-limit": {
+        "entries": [25, 50],
+        "rounds": 1,
+        "rate_limit": True,
+        "max_failures": 0,
+    },
+}
+
+
+class StandInServer:
+    """Minimal imitation of the eMaktab login flow and diary API."""
+
+    def __init__(
+        self,
+        payload: bytes,
+        latency: float = 0.0,
+        userfeed_size: int = 100_000,
+        compress: bool = False,
+    ) -> None:
+        self._payload = payload
+        self._latency = latency
+        self._userfeed_body = b"<html>" + b"x" * userfeed_size + b"</html>"
+        self._compress = compress
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+        self.requests: dict[str, int] = {}
+
+    async def _delay(self, name: str) -> None:
+        self.requests[name] = self.requests.get(name, 0) + 1
+        if self._latency:
+            await asyncio.sleep(self._latency)
+
+    async def _login(self, request: web.Request) -> web.Response:
+        await self._delay("login")
+        await request.post()
+        response = web.Response(status=302, headers={"Location": self.base_url})
+        response.set_cookie(COOKIE_SESSION, "session")
+        return response
+
+    async def _base(self, request: web.Request) -> web.Response:
+        await self._delay("base")
+        response = web.Response(
+            status=302,
+            headers={"Location": f"{self.base_url}/userfeed"},
+        )
+        response.set_cookie(COOKIE_AUTH, "token")
+        return response
+
+    async def _userfeed(self, request: web.Request) -> web.Response:
+        await self._delay("userfeed")
+        return web.Response(body=self._userfeed_body, content_type="text/html")
+
+    async def _diary(self, request: web.Request) -> web.Response:
+        await self._delay("diary")
+        if COOKIE_AUTH not in request.cookies:
+            return web.Response(status=401)
+
+        response = web.Response(body=self._payload, content_type="application/json")
+        if self._compress:
+            response.enable_compression()
+        return response
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post("/login", self._login)
+        app.router.add_get("/", self._base)
+        app.router.add_get("/userfeed", self._userfeed)
+        app.router.add_get("/api/v2/marks/diary", self._diary)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+@contextlib.contextmanager
+def _patched_urls(base_url: str) -> Iterator[None]:
+    """Point auth.py and api.py at the stand-in server."""
+    originals = {
+        (auth_module, "LOGIN_URL"): auth_module.LOGIN_URL,
+        (auth_module, "BASE_URL"): auth_module.BASE_URL,
+        (auth_module, "USERFEED_URL"): auth_module.USERFEED_URL,
+        (api_module, "BASE_URL"): api_module.BASE_URL,
+    }
+    auth_module.LOGIN_URL = f"{base_url}/login"
+    auth_module.BASE_URL = base_url
+    auth_module.USERFEED_URL = f"{base_url}/userfeed"
+    api_module.BASE_URL = base_url
+    try:
+        yield
+    finally:
+        for (module, name), value in originals.items():
+            setattr(module, name, value)
+
+
+def _timed(
+    func: Callable[..., Awaitable[Any]],
+    samples: list[float],
+    spent: list[float],
+    exclude: list[float] | None = None,
+) -> Callable[..., Awaitable[Any]]:
+    """Wrap a coroutine function, recording its duration.
+
+    The duration is also added to `spent[0]`. Time added to `exclude[0]`
+    while the call runs (a nested stage) is subtracted from the sample.
+    """
+
+    async def _wrapper(*args: Any, **kwargs: Any) -> Any:
+        nested = exclude[0] if exclude else 0.0
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            spent[0] += elapsed
+            if exclude:
+                elapsed -= exclude[0] - nested
+            samples.append(elapsed)
+
+    return _wrapper
+
+
+async def _loop_lag_probe(
+    stop: asyncio.Event,
+    samples: list[float],
+    interval: float = 0.01,
+) -> None:
+    """Measure how late the event loop wakes up a sleeping task."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - start - interval))
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    """Return summary statistics in milliseconds."""
+    if not samples:
+        return {"count": 0}
+
+    ordered = sorted(samples)
+
+    def pick(fraction: float) -> float:
+        index = min(len(ordered) - 1, int(fraction * len(ordered)))
+        return ordered[index] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": ordered[-1] * 1000,
+        "total_ms": sum(ordered) * 1000,
+    }
+
+
+async def run_scenario(
+    hass: HomeAssistant,
+    server: StandInServer,
+    entries: int,
+    args: argparse.Namespace,
+) -> dict[str, Any]:
+    """Run `rounds` refreshes of `entries` coordinators and collect metrics."""
+    samples: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    lag: list[float] = []
+    failures = 0
+
+    limiter = EmaktabRateLimiter() if args.rate_limit else None
+    cassette = EmaktabCassette(args.replay) if args.replay else None
+
+    children: list[SimpleNamespace] = []
+    for index in range(entries):
+        auth = EmaktabAuthManager(
+            f"user{index}",
+            "secret",
+            rate_limiter=limiter,
+            lean_login=args.lean_login,
+            cassette=cassette,
+        )
+        # Login runs inside async_get_diary; keep the stages exclusive
+        login_spent = [0.0]
+        auth.async_login = _timed(auth.async_login, samples["login"], login_spent)
+
+        api = EmaktabApiClient(auth, clock=cassette.clock if cassette else None)
+        api.async_get_diary = _timed(
+            api.async_get_diary,
+            samples["diary"],
+            [0.0],
+            exclude=login_spent,
+        )
+
+        coordinator = EmaktabCoordinator(
+            hass=hass,
+            api=api,
+            person_id=args.person_id or str(index),
+            school_id=args.school_id or "1",
+            group_id=None,
+        )
+        entry = SimpleNamespace(
+            entry_id=f"entry{index}",
+            title=f"Child {index}",
+            data={"person_id": str(index), "school_id": "1"},
+        )
+        children.append(
+            SimpleNamespace(
+                auth=auth,
+                coordinator=coordinator,
+                sensors=[
+                    EmaktabDaySensor(coordinator, entry),
+                    EmaktabAverageMarkSensor(coordinator, entry),
+                ],
+            )
+        )
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def refresh(child: SimpleNamespace) -> bool:
+        async with semaphore:
+            start = time.perf_counter()
+            await child.coordinator.async_refresh()
+            samples["refresh"].append(time.perf_counter() - start)
+
+        # What a state write does: build attributes, then serialize them
+        for entity in child.sensors:
+            start = time.perf_counter()
+            state = entity.state
+            attrs = entity.extra_state_attributes
+            samples["attributes"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            json.dumps({"state": state, "attributes": attrs}, cls=JSONEncoder)
+            samples["serialize"].append(time.perf_counter() - start)
+
+        return child.coordinator.last_update_success
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_loop_lag_probe(stop, lag))
+
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    for _ in range(args.rounds):
+        results = await asyncio.gather(*(refresh(child) for child in children))
+        failures += results.count(False)
+
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stop.set()
+    await probe
+
+    for child in children:
+        await child.auth.async_close()
+
+    refreshes = entries * args.rounds
+    stages = {stage: _percentiles(values) for stage, values in samples.items()}
+    busy = sum(stages[stage].get("total_ms", 0.0) for stage in STAGES[1:])
+
+    return {
+        "entries": entries,
+        "rounds": args.rounds,
+        "refreshes": refreshes,
+        "failures": failures,
+        "elapsed_s": elapsed,
+        "throughput_per_s": refreshes / elapsed if elapsed else 0.0,
+        "stages": stages,
+        "stage_share": {
+            stage: (stages[stage].get("total_ms", 0.0) / busy if busy else 0.0)
+            for stage in STAGES[1:]
+        },
+        "loop_lag": _percentiles(lag),
+        "tracemalloc_peak_mb": peak / 2**20,
+    }
+
+
+def _print_summary(report: dict[str, Any]) -> None:
+    header = (
+        f"{'entries':>8} {'refresh/s':>10} {'p50':>8} {'p99':>8} "
+        f"{'login95':>8} {'diary95':>8} {'attr95':>8} {'ser95':>8} "
+        f"{'lag99':>8} {'lagmax':>8} {'peakMB':>8} {'fail':>5}"
+    )
+    print(header, file=sys.stderr)
+
+    for item in report["scenarios"]:
+        stages = item["stages"]
+        lag = item["loop_lag"]
+        print(
+            f"{item['entries']:>8} {item['throughput_per_s']:>10.1f} "
+            f"{stages['refresh'].get('p50_ms', 0):>8.1f} "
+            f"{stages['refresh'].get('p99_ms', 0):>8.1f} "
+            f"{stages['login'].get('p95_ms', 0):>8.1f} "
+            f"{stages['diary'].get('p95_ms', 0):>8.1f} "
+            f"{stages['attributes'].get('p95_ms', 0):>8.3f} "
+            f"{stages['serialize'].get('p95_ms', 0):>8.3f} "
+            f"{lag.get('p99_ms', 0):>8.1f} {lag.get('max_ms', 0):>8.1f} "
+            f"{item['tracemalloc_peak_mb']:>8.1f} {item['failures']:>5}",
+            file=sys.stderr,
+        )
+
+
+async def async_main(args: argparse.Namespace) -> dict[str, Any]:
+    payload = json.dumps(
+        generate_diary(
+            days=args.days,
+            lessons=args.lessons,
+            homework_len=args.homework_len,
+        )
+    ).encode()
+
+    server = StandInServer(
+        payload,
+        latency=args.latency / 1000,
+        compress=args.compress,
+    )
+    await server.start()
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        scenarios: list[dict[str, Any]] = []
+
+        try:
+            # Запись сделана с настоящими адресами — их не подменяем
+            urls = (
+                contextlib.nullcontext()
+                if args.replay
+                else _patched_urls(server.base_url)
+            )
+            with urls:
+                for entries in args.entries:
+                    scenarios.append(await run_scenario(hass, server, entries, args))
+        finally:
+            await hass.async_stop(force=True)
+            await server.stop()
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {
+            key: value for key, value in vars(args).items() if key != "output"
+        },
+        "payload_bytes": len(payload),
+        "server_requests": server.requests,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "scenarios": scenarios,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--entries", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.0, help="server ms")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--lessons", type=int, default=6)
+    parser.add_argument("--homework-len", dest="homework_len", type=int, default=80)
+    parser.add_argument("--compress", action="store_true", help="gzip diary")
+    parser.add_argument(
+        "--rate-limit",
+        dest="rate_limit",
+        action="store_true",
+        help="use the integration's shared rate limiter with default budgets",
+    )
+    parser.add_argument(
+        "--lean-login",
+        dest="lean_login",
+        action="store_true",
+        help="use lean login mode",
+    )
+    parser.add_argument("--replay", help="replay a recorded cassette file")
+    parser.add_argument(
+        "--person-id",
+        dest="person_id",
+        help="person id used in the cassette (with --replay)",
+    )
+    parser.add_argument(
+        "--school-id",
+        dest="school_id",
+        help="school id used in the cassette (with --replay)",
+    )
+    parser.add_argument(
+        "--max-failures",
+        dest="max_failures",
+        type=int,
+        help="exit with status 1 if a scenario has more failed refreshes",
+    )
+    parser.add_argument("--output", default="load_output.json")
+
+    # Пресет задаёт значения по умолчанию, явные опции важнее
+    known, _ = parser.parse_known_args(argv)
+    if known.scenario:
+        parser.set_defaults(**SCENARIOS[known.scenario])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    report = asyncio.run(async_main(args))
+    _print_summary(report)
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+
+    print(f"Wrote report to {args.output}", file=sys.stderr)
+
+    if args.max_failures is not None:
+        failed = [
+            item["entries"]
+            for item in report["scenarios"]
+            if item["failures"] > args.max_failures
+        ]
+        if failed:
+            print(
+                f"More than {args.max_failures} failed refreshes "
+                f"with {failed} entries",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Record a real eMaktab session to a cassette file.
+
+Run from the repository root with real credentials:
+
+    python -m benchmarks.record_cassette --username LOGIN --password PASS \
+        --person-id 123 --school-id 456 --weeks 2 --output cassette.json
+
+The login flow and the diary of the current week (plus `--weeks - 1`
+earlier weeks) are fetched once and stored. Request bodies are not
+recorded, cookie values are replaced (domain and path are kept) and
+the login and password are masked, so the file can be shared. Replay it with
+`python -m benchmarks.load_harness --replay cassette.json ...`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import timedelta
+
+from custom_components.emaktab.api import EmaktabApiClient
+from custom_components.emaktab.auth import EmaktabAuthManager
+from custom_components.emaktab.cassette import EmaktabCassette
+from custom_components.emaktab.clock import local_date
+
+
+async def async_main(args: argparse.Namespace) -> None:
+    cassette = EmaktabCassette(
+        args.output,
+        mode="record",
+        secrets=[args.username, args.password],
+    )
+    auth = EmaktabAuthManager(
+        args.username,
+        args.password,
+        lean_login=args.lean_login,
+        cassette=cassette,
+    )
+    api = EmaktabApiClient(auth, clock=cassette.clock)
+
+    try:
+        await auth.async_login()
+        today = local_date(api.now())
+        for week in range(args.weeks):
+            await api.async_get_diary(
+                args.person_id,
+                args.school_id,
+                when=today - timedelta(weeks=week),
+            )
+    finally:
+        # Сохранение записи происходит при закрытии сессии
+        await auth.async_close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--person-id", dest="person_id", required=True)
+    parser.add_argument("--school-id", dest="school_id", required=True)
+    parser.add_argument("--weeks", type=int, default=1)
+    parser.add_argument(
+        "--lean-login",
+        dest="lean_login",
+        action="store_true",
+        help="use lean login mode",
+    )
+    parser.add_argument("--output", default="cassette.json")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    asyncio.run(async_main(args))
+    print(f"Wrote cassette to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Synthetic eMaktab diary payloads for benchmarks."""
+
+from __future__ import annotations
+
+import random
+from datetime import date, datetime, timedelta, timezone
+from typing import Any
+
+SUBJECTS = [
+    "Matematika",
+    "Ona tili",
+    "Adabiyot",
+    "Ingliz tili",
+    "Rus tili",
+    "Fizika",
+    "Kimyo",
+    "Biologiya",
+    "Tarix",
+    "Geografiya",
+    "Informatika",
+    "Jismoniy tarbiya",
+]
+
+WORK_NAMES = ["Javob", "Nazorat ishi", "Uy vazifasi", "Test", "Diktant"]
+
+_WORDS = (
+    "mashq masala paragraf sahifa o'qish yozish takrorlash jadval "
+    "misol savol javob matn insho"
+).split()
+
+
+def _text(rng: random.Random, length: int) -> str:
+    """Return pseudo-random text of approximately `length` characters."""
+    if length <= 0:
+        return ""
+
+    words: list[str] = []
+    size = 0
+    while size < length:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length]
+
+
+def _timestamp(day: date) -> int:
+    """Return diary-style timestamp (UTC midnight) for a date."""
+    return int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp())
+
+
+def generate_diary(
+    days: int = 7,
+    lessons: int = 6,
+    work_marks: int = 1,
+    marks_per_work: int = 1,
+    homework_len: int = 80,
+    important_works: int = 1,
+    start: date | None = None,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """Build a diary payload shaped like /api/v2/marks/diary.
+
+    Days start on the Monday of the current UTC week unless `start` is
+    given, so "today" is always part of a payload of 7 or more days.
+    """
+    rng = random.Random(seed)
+
+    if start is None:
+        today = datetime.now(timezone.utc).date()
+        start = today - timedelta(days=today.weekday())
+
+    result_days: list[dict[str, Any]] = []
+
+    for day_index in range(days):
+        day = start + timedelta(days=day_index)
+        day_lessons: list[dict[str, Any]] = []
+
+        for number in range(1, lessons + 1):
+            subject = rng.choice(SUBJECTS)
+            day_lessons.append(
+                {
+                    "number": number,
+                    "isEmpty": False,
+                    "subject": {"name": subject, "id": SUBJECTS.index(subject)},
+                    "theme": _text(rng, 40),
+                    "homework": {"text": _text(rng, homework_len)}
+                    if homework_len
+                    else None,
+                    "workMarks": [
+                        {
+                            "workName": rng.choice(WORK_NAMES),
+                            "marks": [
+                                {"value": str(rng.randint(2, 5))}
+                                for _ in range(marks_per_work)
+                            ],
+                        }
+                        for _ in range(work_marks)
+                    ],
+                }
+            )
+
+        result_days.append(
+            {
+                "date": _timestamp(day),
+                "lessons": day_lessons,
+                "importantWorks": [
+                    {
+                        "subject": {"name": rng.choice(SUBJECTS)},
+                        "workName": rng.choice(WORK_NAMES),
+                    }
+                    for _ in range(important_works)
+                ],
+            }
+        )
+
+    return {"days": result_days}
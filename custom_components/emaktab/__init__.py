@@ -2,21 +2,97 @@ from __future__ import annotations
 
 import logging
 
+import aiohttp
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.start import async_at_started
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
+from .analytics import async_get_mark_history
 from .api import EmaktabApiClient
 from .auth import EmaktabAuthManager
-from .const import DOMAIN, PLATFORMS
+from .clock import async_get_clock
+from .const import (
+    API_RATE_BURST,
+    API_RATE_LIMIT,
+    CONF_API_BURST,
+    CONF_API_RATE,
+    CONF_DIARY_CONNECT_TIMEOUT,
+    CONF_DIARY_READ_TIMEOUT,
+    CONF_DIARY_TOTAL_TIMEOUT,
+    CONF_LEAN_LOGIN,
+    CONF_LOGIN_BURST,
+    CONF_LOGIN_CONNECT_TIMEOUT,
+    CONF_LOGIN_RATE,
+    CONF_LOGIN_READ_TIMEOUT,
+    CONF_LOGIN_TOTAL_TIMEOUT,
+    CONF_REFRESH_DEADLINE,
+    DEFAULT_DIARY_CONNECT_TIMEOUT,
+    DEFAULT_DIARY_READ_TIMEOUT,
+    DEFAULT_DIARY_TOTAL_TIMEOUT,
+    DEFAULT_LEAN_LOGIN,
+    DEFAULT_LOGIN_CONNECT_TIMEOUT,
+    DEFAULT_LOGIN_READ_TIMEOUT,
+    DEFAULT_LOGIN_TOTAL_TIMEOUT,
+    DEFAULT_REFRESH_DEADLINE,
+    DOMAIN,
+    LOGIN_RATE_BURST,
+    LOGIN_RATE_LIMIT,
+    PLATFORMS,
+    SIGNAL_ENTRY_CHANGED,
+    SIGNAL_ENTRY_REMOVED,
+    STARTUP_REFRESH_SPREAD,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+    TODO_STORAGE_KEY,
+)
 from .coordinator import EmaktabCoordinator
+from .ratelimit import async_configure_rate_limiter, async_get_rate_limiter
+from .scheduler import async_get_scheduler
+from .services import async_register_services
+from .websocket_api import async_register_websocket_commands
 
 _LOGGER = logging.getLogger(__name__)
 
-
-async def async_setup(hass: HomeAssistant, config: dict) -> bool:
-    """Set up eMaktab integration (YAML deprecated)."""
+_RATE = vol.All(vol.Coerce(float), vol.Range(min=0.01))
+_BURST = vol.All(vol.Coerce(int), vol.Range(min=1))
+
+# Дети добавляются только через UI; в YAML — лишь общие лимиты запросов
+CONFIG_SCHEMA = vol.Schema(
+    {
+        vol.Optional(DOMAIN): vol.Schema(
+            {
+                vol.Optional(CONF_LOGIN_RATE, default=LOGIN_RATE_LIMIT): _RATE,
+                vol.Optional(CONF_LOGIN_BURST, default=LOGIN_RATE_BURST): _BURST,
+                vol.Optional(CONF_API_RATE, default=API_RATE_LIMIT): _RATE,
+                vol.Optional(CONF_API_BURST, default=API_RATE_BURST): _BURST,
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up eMaktab integration (entries via UI, shared limits via YAML)."""
     hass.data.setdefault(DOMAIN, {})
+
+    conf = config.get(DOMAIN)
+    if conf is not None:
+        async_configure_rate_limiter(
+            hass,
+            login_rate=conf[CONF_LOGIN_RATE],
+            login_burst=conf[CONF_LOGIN_BURST],
+            api_rate=conf[CONF_API_RATE],
+            api_burst=conf[CONF_API_BURST],
+        )
+    async_register_websocket_commands(hass)
+    async_register_services(hass)
     return True
 
 
@@ -26,12 +102,31 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     _LOGGER.info("Setting up eMaktab entry: %s", entry.title)
 
+    options = entry.options
+
     auth = EmaktabAuthManager(
         entry.data["username"],
         entry.data["password"],
+        rate_limiter=async_get_rate_limiter(hass),
+        lean_login=options.get(CONF_LEAN_LOGIN, DEFAULT_LEAN_LOGIN),
+        login_timeout=aiohttp.ClientTimeout(
+            total=options.get(CONF_LOGIN_TOTAL_TIMEOUT, DEFAULT_LOGIN_TOTAL_TIMEOUT),
+            connect=options.get(
+                CONF_LOGIN_CONNECT_TIMEOUT, DEFAULT_LOGIN_CONNECT_TIMEOUT
+            ),
+            sock_read=options.get(CONF_LOGIN_READ_TIMEOUT, DEFAULT_LOGIN_READ_TIMEOUT),
+        ),
+        diary_timeout=aiohttp.ClientTimeout(
+            total=options.get(CONF_DIARY_TOTAL_TIMEOUT, DEFAULT_DIARY_TOTAL_TIMEOUT),
+            connect=options.get(
+                CONF_DIARY_CONNECT_TIMEOUT, DEFAULT_DIARY_CONNECT_TIMEOUT
+            ),
+            sock_read=options.get(CONF_DIARY_READ_TIMEOUT, DEFAULT_DIARY_READ_TIMEOUT),
+        ),
     )
 
-    api = EmaktabApiClient(auth)
+    clock = async_get_clock(hass)
+    api = EmaktabApiClient(auth, clock=clock.now)
 
     coordinator = EmaktabCoordinator(
         hass=hass,
@@ -39,9 +134,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         person_id=entry.data["person_id"],
         school_id=entry.data["school_id"],
         group_id=entry.data.get("group_id"),
+        entry_id=entry.entry_id,
+        refresh_deadline=options.get(CONF_REFRESH_DEADLINE, DEFAULT_REFRESH_DEADLINE),
+        clock=clock,
     )
 
-    await coordinator.async_config_entry_first_refresh()
+    # Не ждём сеть при старте: поднимаем сущности из сохранённого снимка
+    # (помечен как устаревший), а живое обновление выполняем в фоне
+    await coordinator.async_load_snapshot()
 
     hass.data[DOMAIN][entry.entry_id] = {
         "coordinator": coordinator,
@@ -49,11 +149,56 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         "auth": auth,
     }
 
+    # Подписки websocket переходят на новый координатор (после перезагрузки)
+    async_dispatcher_send(hass, SIGNAL_ENTRY_CHANGED, entry.entry_id)
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    # История оценок для отчётов пополняется при каждом обновлении
+    history = await async_get_mark_history(hass)
+    person_id = str(entry.data["person_id"])
+
+    @callback
+    def _async_ingest_marks() -> None:
+        history.async_ingest(person_id, coordinator.data)
+
+    entry.async_on_unload(coordinator.async_add_listener(_async_ingest_marks))
+    _async_ingest_marks()
+
+    scheduler = async_get_scheduler(hass)
+    scheduler.async_add(entry.entry_id, coordinator)
+
+    # Смена дня/недели по местному времени: пересчёт "сегодня" и текущей
+    # недели. Новую неделю загружаем не сразу у всех детей (в полночь
+    # понедельника), а в порядке слотов планировщика
+    @callback
+    def _async_handle_rollover(week_changed: bool) -> None:
+        coordinator.async_handle_rollover(week_changed)
+        if week_changed:
+            scheduler.async_refresh_spread(entry.entry_id)
+
+    entry.async_on_unload(clock.async_add_listener(_async_handle_rollover))
+
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
+    # Живое обновление после старта (даже при свежем снимке), при ошибке —
+    # повторы через короткие интервалы, а не через слот. Дети обновляются
+    # не в одно мгновение, а в порядке слотов в пределах минуты; ждём
+    # запуска Home Assistant, чтобы слоты учитывали все записи
+    @callback
+    def _async_refresh_after_start(_hass: HomeAssistant) -> None:
+        scheduler.async_refresh_spread(entry.entry_id, STARTUP_REFRESH_SPREAD)
+
+    entry.async_on_unload(async_at_started(hass, _async_refresh_after_start))
+
     return True
 
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload entry when options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(
@@ -61,8 +206,22 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     )
 
     if unload_ok:
+        async_get_scheduler(hass).async_remove(entry.entry_id)
         data = hass.data[DOMAIN].pop(entry.entry_id, None)
+        async_dispatcher_send(hass, SIGNAL_ENTRY_CHANGED, entry.entry_id)
         if data and "auth" in data:
             await data["auth"].async_close()
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove stored data when a config entry is deleted."""
+    async_dispatcher_send(hass, SIGNAL_ENTRY_REMOVED, entry.entry_id)
+
+    for key in (STORAGE_KEY, TODO_STORAGE_KEY):
+        store = Store(hass, STORAGE_VERSION, f"{key}.{entry.entry_id}")
+        await store.async_remove()
+
+    history = await async_get_mark_history(hass)
+    history.async_remove_person(str(entry.data["person_id"]))
@@ -0,0 +1,336 @@
+"""Mark history and bulk mark reports for eMaktab.
+
+Marks of every child are kept in a columnar layout (one NumPy array per
+field) so that reports over years of history are computed with a few
+vectorized passes instead of walking nested diary dicts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+import numpy as np
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DATA_MARK_HISTORY,
+    MARKS_SAVE_DELAY,
+    MARKS_STORAGE_KEY,
+    STORAGE_VERSION,
+)
+from .diary import iter_days
+
+_LOGGER = logging.getLogger(__name__)
+
+_EPOCH = date(1970, 1, 1)
+
+
+def _day_number(value: date) -> int:
+    """Return days since 1970-01-01."""
+    return (value - _EPOCH).days
+
+
+def _iso(day_number: int) -> str:
+    return date.fromordinal(_EPOCH.toordinal() + int(day_number)).isoformat()
+
+
+def _mark_label(value: float) -> str:
+    """Return mark value as text ("5", not "5.0")."""
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+@dataclass(frozen=True)
+class MarkColumns:
+    """Immutable view of the mark history (safe to use in the executor)."""
+
+    date: np.ndarray  # int32, days since 1970-01-01
+    subject: np.ndarray  # int32, index into subjects
+    value: np.ndarray  # float32
+    person: np.ndarray  # int32, index into people
+    subjects: tuple[str, ...]
+    people: tuple[str, ...]
+
+
+class MarkHistory:
+    """Columnar store of numeric marks of all children."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._store: Store = Store(hass, STORAGE_VERSION, MARKS_STORAGE_KEY)
+        self._lock = asyncio.Lock()
+        self._loaded = False
+
+        # Таблицы интернирования: код -> имя и имя -> код
+        self._subjects: list[str] = []
+        self._subject_codes: dict[str, int] = {}
+        self._people: list[str] = []
+        self._person_codes: dict[str, int] = {}
+
+        self._date = np.empty(0, dtype=np.int32)
+        self._subject = np.empty(0, dtype=np.int32)
+        self._value = np.empty(0, dtype=np.float32)
+        self._person = np.empty(0, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self._value)
+
+    async def async_load(self) -> None:
+        """Load stored history (once)."""
+        async with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+
+            try:
+                stored = await self._store.async_load()
+            except Exception as err:
+                _LOGGER.warning("Failed to load eMaktab mark history: %s", err)
+                return
+
+            if not stored:
+                return
+
+            self._subjects = list(stored["subjects"])
+            self._subject_codes = {name: i for i, name in enumerate(self._subjects)}
+            self._people = list(stored["people"])
+            self._person_codes = {pid: i for i, pid in enumerate(self._people)}
+            self._date = np.asarray(stored["date"], dtype=np.int32)
+            self._subject = np.asarray(stored["subject"], dtype=np.int32)
+            self._value = np.asarray(stored["value"], dtype=np.float32)
+            self._person = np.asarray(stored["person"], dtype=np.int32)
+
+            _LOGGER.debug("Loaded %s marks from history", len(self))
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {
+            "subjects": self._subjects,
+            "people": self._people,
+            "date": self._date.tolist(),
+            "subject": self._subject.tolist(),
+            "value": self._value.tolist(),
+            "person": self._person.tolist(),
+        }
+
+    def _intern(self, codes: dict[str, int], names: list[str], name: str) -> int:
+        code = codes.get(name)
+        if code is None:
+            code = codes[name] = len(names)
+            names.append(name)
+        return code
+
+    @callback
+    def async_ingest(self, person_id: str, data: dict[str, Any] | None) -> None:
+        """Replace marks of the days present in coordinator data."""
+        if not data:
+            return
+
+        person = self._intern(self._person_codes, self._people, str(person_id))
+
+        days: list[int] = []
+        rows: list[tuple[int, int, float]] = []
+
+        for when, day in iter_days(data):
+            number = _day_number(when)
+            days.append(number)
+
+            for lesson in day.get("lessons") or []:
+                subject_name = (lesson.get("subject") or {}).get("name")
+                if not subject_name:
+                    continue
+
+                for work in lesson.get("workMarks") or []:
+                    for mark in work.get("marks") or []:
+                        try:
+                            value = float(mark.get("value"))
+                        except (TypeError, ValueError):
+                            continue  # нечисловые отметки не учитываем
+                        subject = self._intern(
+                            self._subject_codes, self._subjects, subject_name
+                        )
+                        rows.append((number, subject, value))
+
+        if not days:
+            return
+
+        # Дни из ответа заменяются целиком (оценки могли исправить или удалить)
+        keep = ~(
+            (self._person == person)
+            & np.isin(self._date, np.asarray(days, dtype=np.int32))
+        )
+        new = np.asarray(rows, dtype=np.float64).reshape(-1, 3)
+
+        self._date = np.concatenate(
+            (self._date[keep], new[:, 0].astype(np.int32))
+        )
+        self._subject = np.concatenate(
+            (self._subject[keep], new[:, 1].astype(np.int32))
+        )
+        self._value = np.concatenate(
+            (self._value[keep], new[:, 2].astype(np.float32))
+        )
+        self._person = np.concatenate(
+            (self._person[keep], np.full(len(new), person, dtype=np.int32))
+        )
+
+        self._store.async_delay_save(self._data_to_save, MARKS_SAVE_DELAY)
+
+    @callback
+    def async_remove_person(self, person_id: str) -> None:
+        """Drop all marks of a child."""
+        person = self._person_codes.get(str(person_id))
+        if person is None:
+            return
+
+        keep = self._person != person
+        self._date = self._date[keep]
+        self._subject = self._subject[keep]
+        self._value = self._value[keep]
+        self._person = self._person[keep]
+
+        self._store.async_delay_save(self._data_to_save, MARKS_SAVE_DELAY)
+
+    @callback
+    def snapshot(self) -> MarkColumns:
+        """Return current columns (arrays are replaced, never mutated)."""
+        return MarkColumns(
+            date=self._date,
+            subject=self._subject,
+            value=self._value,
+            person=self._person,
+            subjects=tuple(self._subjects),
+            people=tuple(self._people),
+        )
+
+
+async def async_get_mark_history(hass: HomeAssistant) -> MarkHistory:
+    """Return the loaded mark history shared by all config entries."""
+    history: MarkHistory | None = hass.data.get(DATA_MARK_HISTORY)
+    if history is None:
+        history = hass.data[DATA_MARK_HISTORY] = MarkHistory(hass)
+    await history.async_load()
+    return history
+
+
+def _summarize(
+    dates: np.ndarray,
+    subjects: np.ndarray,
+    values: np.ndarray,
+    subject_names: tuple[str, ...],
+) -> dict[str, Any]:
+    """Aggregate marks of one child."""
+    n_subjects = len(subject_names)
+    values = values.astype(np.float64)
+
+    # По предметам
+    counts = np.bincount(subjects, minlength=n_subjects)
+    sums = np.bincount(subjects, weights=values, minlength=n_subjects)
+    by_subject = {
+        subject_names[i]: {
+            "average": round(float(sums[i] / counts[i]), 2),
+            "count": int(counts[i]),
+        }
+        for i in np.flatnonzero(counts)
+    }
+
+    # По неделям (1970-01-01 — четверг, поэтому сдвиг на 3 дня)
+    mondays = dates - (dates + 3) % 7
+    week_keys, week_index = np.unique(mondays, return_inverse=True)
+    week_counts = np.bincount(week_index)
+    week_sums = np.bincount(week_index, weights=values)
+    by_week = {
+        _iso(week_keys[i]): {
+            "average": round(float(week_sums[i] / week_counts[i]), 2),
+            "count": int(week_counts[i]),
+        }
+        for i in range(len(week_keys))
+    }
+
+    marks, mark_counts = np.unique(values, return_counts=True)
+
+    # Рост: наклон средних по неделям (оценок в неделю) для каждого предмета
+    n_weeks = len(week_keys)
+    cell = subjects.astype(np.int64) * n_weeks + week_index
+    cell_counts = np.bincount(cell, minlength=n_subjects * n_weeks)
+    cell_sums = np.bincount(cell, weights=values, minlength=n_subjects * n_weeks)
+    filled = np.flatnonzero(cell_counts)
+
+    cell_subject = filled // n_weeks
+    x = (week_keys[filled % n_weeks] - week_keys[0]) / 7.0
+    y = cell_sums[filled] / cell_counts[filled]
+
+    n = np.bincount(cell_subject, minlength=n_subjects).astype(np.float64)
+    sx = np.bincount(cell_subject, weights=x, minlength=n_subjects)
+    sy = np.bincount(cell_subject, weights=y, minlength=n_subjects)
+    sxy = np.bincount(cell_subject, weights=x * y, minlength=n_subjects)
+    sxx = np.bincount(cell_subject, weights=x * x, minlength=n_subjects)
+
+    denominator = n * sxx - sx * sx
+    valid = np.flatnonzero((n >= 2) & (denominator > 0))
+    slope = (n[valid] * sxy[valid] - sx[valid] * sy[valid]) / denominator[valid]
+    order = np.argsort(-slope, kind="stable")
+
+    return {
+        "mark_count": int(len(values)),
+        "average": round(float(values.mean()), 2),
+        "subjects": by_subject,
+        "weeks": by_week,
+        "value_counts": {
+            _mark_label(mark): int(count) for mark, count in zip(marks, mark_counts)
+        },
+        "improvement": [
+            {
+                "subject": subject_names[valid[i]],
+                "slope": round(float(slope[i]), 4),
+                "weeks": int(n[valid[i]]),
+            }
+            for i in order
+        ],
+    }
+
+
+def build_report(
+    columns: MarkColumns,
+    person_ids: list[str] | None = None,
+    start: date | None = None,
+    end: date | None = None,
+) -> dict[str, Any]:
+    """Build mark report per child (CPU-bound, run in the executor).
+
+    For each child: overall, per-subject and per-week averages, counts of
+    each mark value and subjects ranked by improvement (slope of weekly
+    averages, marks per week).
+    """
+    mask = np.ones(len(columns.value), dtype=bool)
+    if start is not None:
+        mask &= columns.date >= _day_number(start)
+    if end is not None:
+        mask &= columns.date <= _day_number(end)
+
+    wanted = columns.people if person_ids is None else person_ids
+
+    children: dict[str, Any] = {}
+    for person_id in wanted:
+        if person_id not in columns.people:
+            continue
+
+        rows = mask & (columns.person == columns.people.index(person_id))
+        if not rows.any():
+            continue
+
+        children[person_id] = _summarize(
+            columns.date[rows],
+            columns.subject[rows],
+            columns.value[rows],
+            columns.subjects,
+        )
+
+    return {
+        "start_date": start.isoformat() if start else None,
+        "end_date": end.isoformat() if end else None,
+        "children": children,
+    }
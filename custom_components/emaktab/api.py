@@ -2,54 +2,73 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from datetime import datetime, timedelta, timezone
-from typing import Any
+from datetime import date, datetime, timezone
+from typing import Any, Callable
 
 import aiohttp
+from homeassistant.util.json import json_loads
 
-from .auth import EmaktabAuthManager
-from .const import BASE_URL
+from .auth import EmaktabAuthManager, retry_after
+from .clock import local_date, week_range_utc
+from .const import BASE_URL, JSON_EXECUTOR_THRESHOLD
+
+try:
+    from aiohttp.compression_utils import HAS_BROTLI
+except ImportError:  # старые версии aiohttp
+    HAS_BROTLI = False
 
 _LOGGER = logging.getLogger(__name__)
 
+# Только те кодировки, которые aiohttp умеет распаковать
+ACCEPT_ENCODING = "gzip, deflate, br" if HAS_BROTLI else "gzip, deflate"
+
 
 class EmaktabApiClient:
     """Client for eMaktab API."""
 
-    def __init__(self, auth: EmaktabAuthManager) -> None:
+    def __init__(
+        self,
+        auth: EmaktabAuthManager,
+        clock: Callable[[], datetime] | None = None,
+    ) -> None:
         self._auth = auth
+        # Источник текущего времени (подменяется при воспроизведении записи)
+        self._clock = clock or (lambda: datetime.now(timezone.utc))
+
+    def now(self) -> datetime:
+        """Return current moment (UTC) as seen by this client."""
+        return self._clock()
 
     @staticmethod
-    def _week_range_utc(now: datetime) -> tuple[int, int]:
-        """Return UTC timestamps for current week (Mon 00:00 - Sun 23:59:59)."""
-        # Normalize to UTC
-        now_utc = now.astimezone(timezone.utc)
-        start = now_utc - timedelta(days=now_utc.weekday())
-        start = start.replace(hour=0, minute=0, second=0, microsecond=0)
-        end = start + timedelta(days=6, hours=23, minutes=59, seconds=59)
-        return int(start.timestamp()), int(end.timestamp())
+    async def _decode_json(body: bytes) -> Any:
+        """Decode JSON body, off the event loop if it is large."""
+        if len(body) < JSON_EXECUTOR_THRESHOLD:
+            return json_loads(body)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, json_loads, body)
 
     async def async_get_diary(
         self,
         person_id: str,
         school_id: str,
+        when: date | None = None,
     ) -> dict[str, Any]:
         """
         Fetch diary data for the current week from v2 API.
 
+        The current week is the local one (Home Assistant timezone). If
+        `when` is given, fetch the week containing that date instead.
         Returns raw JSON as provided by API.
         """
         await self._auth.ensure_logged_in()
 
         url = f"{BASE_URL}/api/v2/marks/diary"
 
-        now = datetime.now(timezone.utc)
-        start_ts, finish_ts = self._week_range_utc(now)
-        
-        # ВРЕМЕННО: фиксированная учебная дата для тестирования
-        #now = datetime(2025, 11, 13, tzinfo=timezone.utc)
-        #start_ts, finish_ts = self._week_range_utc(now)
+        now = self.now()
+        start_ts, finish_ts = week_range_utc(when or local_date(now))
 
         params = {
             "personId": person_id,
@@ -66,21 +85,54 @@ class EmaktabApiClient:
             finish_ts,
         )
 
+        data = await self._async_fetch_diary(url, params, relogin=True)
+        if data is None:
+            # Сессия отклонена, вход выполнен заново (после неудачного
+            # облегчённого входа — полным) — повторяем запрос один раз
+            _LOGGER.info("Repeating eMaktab diary request after re-login")
+            data = await self._async_fetch_diary(url, params, relogin=False)
+        return data
+
+    async def _async_fetch_diary(
+        self,
+        url: str,
+        params: dict[str, Any],
+        relogin: bool,
+    ) -> Any:
+        """Perform one diary request.
+
+        Returns None if the session was rejected and `relogin` allowed
+        logging in again, so the caller can repeat the request.
+        """
+        limiter = self._auth.rate_limiter
+        if limiter is not None:
+            await limiter.api.async_acquire(self._auth.username)
+
         try:
             async with self._auth.session.get(
                 url,
                 params=params,
                 headers={
                     "Referer": f"{BASE_URL}/",
+                    "Accept": "application/json",
+                    "Accept-Encoding": ACCEPT_ENCODING,
                 },
+                timeout=self._auth.diary_timeout,
             ) as response:
                 if response.status in (401, 403):
+                    if not relogin:
+                        raise RuntimeError(
+                            "Authorization failed, re-login required"
+                        )
                     _LOGGER.warning(
                         "Authorization error (%s), retrying login",
                         response.status,
                     )
-                    await self._auth.async_login()
-                    raise RuntimeError("Authorization failed, re-login required")
+                    await self._auth.async_handle_unauthorized()
+                    return None
+
+                if response.status == 429 and limiter is not None:
+                    limiter.api.penalize(retry_after(response))
 
                 if response.status != 200:
                     text = await response.text()
@@ -93,9 +145,14 @@ class EmaktabApiClient:
                         f"Diary API request failed with status {response.status}"
                     )
 
-                data = await response.json()
+                body = await response.read()
+                data = await self._decode_json(body)
+                self._auth.mark_validated()
                 _LOGGER.debug(
-                    "eMaktab diary API response received (keys: %s)",
+                    "eMaktab diary API response received "
+                    "(encoding: %s, bytes: %s, keys: %s)",
+                    response.headers.get("Content-Encoding", "identity"),
+                    len(body),
                     list(data.keys()) if isinstance(data, dict) else type(data),
                 )
                 return data
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import logging
 from typing import Optional
+from urllib.parse import urljoin
 
 import aiohttp
 from aiohttp import ClientResponse
@@ -14,20 +15,66 @@ from .const import (
     USERFEED_URL,
     COOKIE_AUTH,
     DEFAULT_USER_AGENT,
+    LEAN_LOGIN_MAX_REDIRECTS,
     REQUEST_TIMEOUT,
 )
+from .cassette import EmaktabCassette
+from .ratelimit import EmaktabRateLimiter
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def retry_after(response: ClientResponse) -> float:
+    """Return Retry-After delay in seconds (defaults to one minute)."""
+    try:
+        return max(1.0, float(response.headers.get("Retry-After", "")))
+    except ValueError:
+        return 60.0
+
+
 class EmaktabAuthManager:
     """Handle authentication and session management."""
 
-    def __init__(self, username: str, password: str) -> None:
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        rate_limiter: Optional[EmaktabRateLimiter] = None,
+        lean_login: bool = False,
+        login_timeout: Optional[aiohttp.ClientTimeout] = None,
+        diary_timeout: Optional[aiohttp.ClientTimeout] = None,
+        cassette: Optional[EmaktabCassette] = None,
+    ) -> None:
         self._username = username
         self._password = password
+        self._rate_limiter = rate_limiter
+        self._lean_login = lean_login
+        self._login_timeout = login_timeout or aiohttp.ClientTimeout(
+            total=REQUEST_TIMEOUT
+        )
+        self._diary_timeout = diary_timeout or aiohttp.ClientTimeout(
+            total=REQUEST_TIMEOUT
+        )
+        self._cassette = cassette
+        # False после "облегчённого" входа, пока API не подтвердит сессию
+        self._validated = True
         self._session: Optional[aiohttp.ClientSession] = None
 
+    @property
+    def username(self) -> str:
+        """Return account login (used as rate limiter key)."""
+        return self._username
+
+    @property
+    def rate_limiter(self) -> Optional[EmaktabRateLimiter]:
+        """Return shared rate limiter, if any."""
+        return self._rate_limiter
+
+    @property
+    def diary_timeout(self) -> aiohttp.ClientTimeout:
+        """Return timeout for diary API requests."""
+        return self._diary_timeout
+
     @property
     def session(self) -> aiohttp.ClientSession:
         """Return active aiohttp session."""
@@ -40,6 +87,11 @@ class EmaktabAuthManager:
         if self._session is not None:
             return
 
+        if self._cassette is not None and self._cassette.replaying:
+            self._session = self._cassette.replay_session()
+            _LOGGER.debug("HTTP session initialized (cassette replay)")
+            return
+
         cookie_jar = aiohttp.CookieJar(unsafe=True)
 
         timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
@@ -52,12 +104,19 @@ class EmaktabAuthManager:
             },
         )
 
+        if self._cassette is not None:
+            self._session = self._cassette.recording_session(self._session)
+
         _LOGGER.debug("HTTP session initialized")
 
     async def async_login(self) -> None:
-        """Perform full login flow."""
+        """Perform login flow (full or lean, depending on configuration)."""
         await self.async_init_session()
 
+        if self._lean_login:
+            await self._async_lean_login()
+            return
+
         _LOGGER.info("Starting eMaktab login flow")
 
         # STEP 1: POST login
@@ -75,8 +134,60 @@ class EmaktabAuthManager:
         response = await self._get_userfeed()
         await self._expect_status(response, 200, "userfeed GET")
 
+        self._validated = True
         _LOGGER.info("eMaktab login successful")
 
+    async def _async_lean_login(self) -> None:
+        """Log in with as few requests as possible.
+
+        The auth cookie is treated as sufficient: redirects after the login
+        POST are followed only until it appears, and the userfeed page is
+        not fetched. The session is validated by the first API call.
+        """
+        _LOGGER.info("Starting eMaktab login flow (lean)")
+
+        response = await self._post_login()
+        location = response.headers.get("Location")
+        await self._expect_status(response, 302, "login POST")
+
+        url = urljoin(LOGIN_URL, location) if location else BASE_URL
+
+        for _ in range(LEAN_LOGIN_MAX_REDIRECTS):
+            if self._has_auth_cookie():
+                break
+
+            response = await self._get_base(url)
+            location = response.headers.get("Location")
+            response.release()
+
+            if response.status not in (301, 302, 303, 307, 308) or not location:
+                break
+            url = urljoin(url, location)
+
+        if not self._has_auth_cookie():
+            raise RuntimeError("Auth cookie not found after login redirects")
+
+        self._validated = False
+        _LOGGER.info("eMaktab login successful (lean, not yet validated)")
+
+    def mark_validated(self) -> None:
+        """Record that an API call succeeded with the current session."""
+        self._validated = True
+
+    async def async_handle_unauthorized(self) -> None:
+        """Log in again after the API rejected the session.
+
+        If the session came from a lean login that was never validated,
+        lean mode is switched off and the full flow is used from now on.
+        """
+        if self._lean_login and not self._validated:
+            _LOGGER.warning(
+                "Session from lean login was rejected, using full login flow"
+            )
+            self._lean_login = False
+
+        await self.async_login()
+
     async def ensure_logged_in(self) -> None:
         """Ensure we have a valid authenticated session."""
         if self._session is None:
@@ -121,22 +232,30 @@ class EmaktabAuthManager:
 
         _LOGGER.debug("POST login request (browser-like form)")
 
+        await self._throttle()
+
         return await self._session.post(
             LOGIN_URL,
             data=data,
             headers=headers,
             allow_redirects=False,
+            timeout=self._login_timeout,
         )
 
-    async def _get_base(self) -> ClientResponse:
-        """GET base domain to complete auth cookies."""
+    async def _get_base(self, url: Optional[str] = None) -> ClientResponse:
+        """GET base domain (or a login redirect) to complete auth cookies."""
         assert self._session is not None
 
-        _LOGGER.debug("GET base URL")
+        url = url or BASE_URL
+
+        _LOGGER.debug("GET %s", url)
+
+        await self._throttle()
 
         return await self._session.get(
-            BASE_URL,
+            url,
             allow_redirects=False,
+            timeout=self._login_timeout,
         )
 
     async def _get_userfeed(self) -> ClientResponse:
@@ -145,14 +264,22 @@ class EmaktabAuthManager:
 
         _LOGGER.debug("GET userfeed URL")
 
+        await self._throttle()
+
         return await self._session.get(
             USERFEED_URL,
             allow_redirects=False,
             headers={
                 "Referer": BASE_URL,
             },
+            timeout=self._login_timeout,
         )
 
+    async def _throttle(self) -> None:
+        """Wait for the shared login budget."""
+        if self._rate_limiter is not None:
+            await self._rate_limiter.login.async_acquire(self._username)
+
     async def _expect_status(
         self,
         response: ClientResponse,
@@ -161,6 +288,9 @@ class EmaktabAuthManager:
     ) -> None:
         """Validate HTTP response status."""
         if response.status != expected_status:
+            if response.status == 429 and self._rate_limiter is not None:
+                self._rate_limiter.login.penalize(retry_after(response))
+
             text = await response.text()
             _LOGGER.error(
                 "Unexpected status during %s: %s, body=%s",
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any
 
@@ -48,20 +49,27 @@ class EmaktabUpdateAllButton(ButtonEntity):
 
         domain_data: dict[str, Any] = self.hass.data.get(DOMAIN, {})
 
-        for entry_id, data in domain_data.items():
-            coordinator = data.get("coordinator")
-            if not coordinator:
-                continue
-
-            try:
-                await coordinator.async_request_refresh()
-                _LOGGER.debug(
-                    "eMaktab data refreshed for entry %s",
-                    entry_id,
-                )
-            except Exception as err:
-                _LOGGER.error(
-                    "Failed to refresh eMaktab data for entry %s: %s",
-                    entry_id,
-                    err,
-                )
+        # Обновляем всех детей параллельно: медленный ребёнок не задерживает
+        # остальных (каждое обновление ограничено своим дедлайном)
+        await asyncio.gather(
+            *(
+                self._async_refresh_entry(entry_id, data.get("coordinator"))
+                for entry_id, data in domain_data.items()
+                if data.get("coordinator")
+            )
+        )
+
+    async def _async_refresh_entry(self, entry_id: str, coordinator) -> None:
+        """Refresh one entry, logging failures."""
+        try:
+            await coordinator.async_request_refresh()
+            _LOGGER.debug(
+                "eMaktab data refreshed for entry %s",
+                entry_id,
+            )
+        except Exception as err:
+            _LOGGER.error(
+                "Failed to refresh eMaktab data for entry %s: %s",
+                entry_id,
+                err,
+            )
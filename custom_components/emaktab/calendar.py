@@ -0,0 +1,177 @@
+"""Calendar for eMaktab integration (lessons and important works)."""
+
+from __future__ import annotations
+
+import logging
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from homeassistant.components.calendar import CalendarEntity, CalendarEvent
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
+
+from .const import CALENDAR_MAX_WEEKS, DOMAIN
+from .diary import iter_days
+
+_LOGGER = logging.getLogger(__name__)
+
+ONE_DAY = timedelta(days=1)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities,
+) -> None:
+    """Set up eMaktab calendar from a config entry."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    coordinator = data["coordinator"]
+
+    async_add_entities([EmaktabCalendar(coordinator, entry)])
+
+
+def _lesson_event(when: date, lesson: dict[str, Any]) -> CalendarEvent:
+    """Build all-day event for a lesson."""
+    number = lesson.get("number")
+    subject = (lesson.get("subject") or {}).get("name") or "—"
+
+    description: list[str] = []
+    if lesson.get("theme"):
+        description.append(f"Topic: {lesson['theme']}")
+    homework = (lesson.get("homework") or {}).get("text")
+    if homework:
+        description.append(f"Homework: {homework}")
+
+    return CalendarEvent(
+        start=when,
+        end=when + ONE_DAY,
+        summary=f"{number}. {subject}" if number is not None else subject,
+        description="\n".join(description) or None,
+        uid=f"{when.isoformat()}_lesson_{number}",
+    )
+
+
+def _important_work_event(
+    when: date,
+    index: int,
+    work: dict[str, Any],
+) -> CalendarEvent:
+    """Build all-day event for an important work."""
+    subject = (work.get("subject") or {}).get("name")
+    name = work.get("workName") or work.get("name") or "Important work"
+
+    return CalendarEvent(
+        start=when,
+        end=when + ONE_DAY,
+        summary=f"{subject}: {name}" if subject else name,
+        uid=f"{when.isoformat()}_work_{index}",
+    )
+
+
+class EventIndex:
+    """Interval index over calendar events with date bounds.
+
+    Events are kept sorted by start date. Since no event spans more than
+    `max_span` days, all events overlapping [first, last] start within
+    [first - max_span + 1, last] and are found with two bisections.
+    """
+
+    def __init__(self, events: list[CalendarEvent]) -> None:
+        self._events = sorted(events, key=lambda e: (e.start, e.uid or ""))
+        self._starts: list[date] = [e.start for e in self._events]
+        self._max_span = max(
+            ((e.end - e.start) for e in self._events),
+            default=ONE_DAY,
+        )
+
+    @classmethod
+    def from_data(cls, data: dict[str, Any]) -> EventIndex:
+        """Build index from coordinator data."""
+        events: list[CalendarEvent] = []
+
+        for when, day in iter_days(data):
+            for lesson in day.get("lessons", []):
+                if lesson.get("isEmpty"):
+                    continue
+                events.append(_lesson_event(when, lesson))
+
+            for index, work in enumerate(day.get("importantWorks") or []):
+                events.append(_important_work_event(when, index, work))
+
+        return cls(events)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def between(self, first: date, last: date) -> list[CalendarEvent]:
+        """Return events overlapping the inclusive date range."""
+        lo = bisect_left(self._starts, first - self._max_span + ONE_DAY)
+        hi = bisect_right(self._starts, last)
+        return [e for e in self._events[lo:hi] if e.end > first]
+
+    def next_from(self, first: date) -> CalendarEvent | None:
+        """Return the first event that is in progress or starts after date."""
+        events = self.between(first, first)
+        if events:
+            return events[0]
+
+        index = bisect_left(self._starts, first)
+        if index < len(self._events):
+            return self._events[index]
+        return None
+
+
+class EmaktabCalendar(CoordinatorEntity, CalendarEntity):
+    """Calendar with lessons and important works of a child."""
+
+    _attr_has_entity_name = True
+    _attr_icon = "mdi:calendar-school"
+
+    def __init__(self, coordinator, entry) -> None:
+        super().__init__(coordinator)
+        self._entry = entry
+        self._attr_unique_id = f"{entry.entry_id}_calendar"
+        self._attr_name = f"School Calendar ({entry.title})"
+        self._attr_attribution = "Data provided by eMaktab.uz"
+        self._index = EventIndex.from_data(coordinator.data or {})
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Rebuild the event index once per refresh."""
+        self._index = EventIndex.from_data(self.coordinator.data or {})
+        super()._handle_coordinator_update()
+
+    @property
+    def event(self) -> CalendarEvent | None:
+        """Return the current or next upcoming event."""
+        return self._index.next_from(self.coordinator.today)
+
+    async def async_get_events(
+        self,
+        hass: HomeAssistant,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> list[CalendarEvent]:
+        """Return events in a range (answered from the index only)."""
+        first = dt_util.as_local(start_date).date()
+        # end_date is exclusive
+        last = dt_util.as_local(end_date - timedelta(microseconds=1)).date()
+        if last < first:
+            return []
+
+        # Недостающие недели догружаются обычным обновлением координатора;
+        # слишком широкие диапазоны (год и т.п.) не догружаем
+        missing = self.coordinator.missing_weeks(first, last)
+        if missing and len(missing) <= CALENDAR_MAX_WEEKS:
+            _LOGGER.debug(
+                "Calendar range %s..%s needs %s uncached weeks",
+                first,
+                last,
+                len(missing),
+            )
+            self.coordinator.async_request_weeks(missing)
+
+        return self._index.between(first, last)
@@ -0,0 +1,379 @@
+"""Record/replay of eMaktab HTTP exchanges (for offline tests and profiling).
+
+A cassette wraps the aiohttp session used by EmaktabAuthManager (and,
+through it, EmaktabApiClient). In record mode real requests are sent and
+every response is written to a JSON file; in replay mode no network is
+used and responses come from the file. Credentials are never stored:
+request bodies are not recorded, cookie values are replaced (domain and
+path are kept) and the given secrets are masked in response headers and
+bodies. Secrets are masked only as whole words (a password "2" does not
+touch "127.0.0.1"), and in JSON bodies only inside string values, so the
+body stays valid JSON. Request URLs carry no credentials and are stored
+as is: they are the keys used to match requests during replay.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from http.cookies import SimpleCookie
+from pathlib import Path
+from typing import Any, Callable
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+_LOGGER = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+REDACTED = "REDACTED"
+
+# Параметры, которые меняются при каждом запросе и не участвуют в сопоставлении
+VOLATILE_PARAMS = frozenset({"timestamp"})
+
+# Заголовки ответа, которые не сохраняются
+DROPPED_HEADERS = frozenset({"set-cookie", "content-encoding", "content-length"})
+
+# Атрибуты cookie, которые сохраняются (от них зависит, куда cookie уходит)
+COOKIE_ATTRIBUTES = ("domain", "path")
+
+
+class CassetteMiss(aiohttp.ClientError):
+    """No recorded response matches a request during replay."""
+
+
+def _recorded_cookies(cookies: SimpleCookie) -> dict[str, dict[str, str]]:
+    """Return cookies to store: value replaced, domain and path kept."""
+    recorded: dict[str, dict[str, str]] = {}
+    for name, morsel in cookies.items():
+        recorded[name] = {"value": REDACTED}
+        for attr in COOKIE_ATTRIBUTES:
+            if morsel[attr]:
+                recorded[name][attr] = morsel[attr]
+    return recorded
+
+
+def _replay_cookies(recorded: dict[str, Any]) -> SimpleCookie:
+    """Rebuild recorded cookies with their domain and path."""
+    cookies = SimpleCookie()
+    for name, cookie in recorded.items():
+        # Старые записи хранили только значение (cookie без домена)
+        if not isinstance(cookie, dict):
+            cookie = {"value": cookie}
+        cookies[name] = cookie["value"]
+        for attr in COOKIE_ATTRIBUTES:
+            if cookie.get(attr):
+                cookies[name][attr] = cookie[attr]
+    return cookies
+
+
+class SimulatedClock:
+    """Clock following the recorded time of replayed responses.
+
+    It starts at a fixed moment (the recording time) and moves forward to
+    the recorded time of each replayed response. If not `frozen`, it also
+    advances with real elapsed time in between.
+    """
+
+    def __init__(self, start: datetime, frozen: bool = True) -> None:
+        self._current = start.astimezone(timezone.utc)
+        self._frozen = frozen
+        self._set_at = time.monotonic()
+
+    def __call__(self) -> datetime:
+        if self._frozen:
+            return self._current
+        return self._current + timedelta(seconds=time.monotonic() - self._set_at)
+
+    def advance_to(self, moment: datetime) -> None:
+        """Move the clock forward to `moment` (never backwards)."""
+        if moment > self():
+            self._current = moment.astimezone(timezone.utc)
+            self._set_at = time.monotonic()
+
+
+def _request_key(method: str, url: str, params: dict[str, Any] | None) -> str:
+    """Return key used to match a request to recorded interactions."""
+    merged = dict(URL(url).query)
+    merged.update({k: str(v) for k, v in (params or {}).items()})
+    query = "&".join(
+        f"{k}={merged[k]}" for k in sorted(merged) if k not in VOLATILE_PARAMS
+    )
+    base = str(URL(url).with_query(None))
+    return f"{method.upper()} {base}?{query}"
+
+
+class EmaktabCassette:
+    """Recorded HTTP exchanges backed by a JSON file."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        mode: str = "replay",
+        secrets: list[str] | None = None,
+        frozen_clock: bool = True,
+    ) -> None:
+        if mode not in ("record", "replay"):
+            raise ValueError("mode must be 'record' or 'replay'")
+
+        self._path = Path(path)
+        self._mode = mode
+        # Секреты заменяются только целыми словами
+        secrets = sorted({s for s in (secrets or []) if s}, key=len, reverse=True)
+        self._pattern: re.Pattern[str] | None = (
+            re.compile(
+                "|".join(rf"(?<!\w){re.escape(s)}(?!\w)" for s in secrets)
+            )
+            if secrets
+            else None
+        )
+        self._interactions: list[dict[str, Any]] = []
+        self._recorded_at: datetime | None = None
+        self._simulated: SimulatedClock | None = None
+
+        if mode == "replay":
+            self._load()
+            assert self._recorded_at is not None
+            self._simulated = SimulatedClock(self._recorded_at, frozen=frozen_clock)
+            self.clock: Callable[[], datetime] = self._simulated
+        else:
+            self.clock = lambda: datetime.now(timezone.utc)
+
+    @property
+    def replaying(self) -> bool:
+        """Return True in replay mode."""
+        return self._mode == "replay"
+
+    @property
+    def recorded_at(self) -> datetime | None:
+        """Return moment of the first recorded interaction."""
+        return self._recorded_at
+
+    def _load(self) -> None:
+        content = json.loads(self._path.read_text(encoding="utf-8"))
+        if content.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version: {content.get('version')}")
+
+        self._interactions = content["interactions"]
+        self._recorded_at = datetime.fromisoformat(content["recorded_at"])
+
+    def save(self) -> None:
+        """Write recorded interactions to disk."""
+        if self.replaying:
+            return
+
+        recorded_at = self._recorded_at or datetime.now(timezone.utc)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._path.write_text(
+            json.dumps(
+                {
+                    "version": CASSETTE_VERSION,
+                    "recorded_at": recorded_at.isoformat(),
+                    "interactions": self._interactions,
+                },
+                ensure_ascii=False,
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+        _LOGGER.info(
+            "Cassette saved: %s (%s interactions)",
+            self._path,
+            len(self._interactions),
+        )
+
+    def _redact(self, text: str) -> str:
+        if self._pattern is None:
+            return text
+        return self._pattern.sub(REDACTED, text)
+
+    def _redact_json(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return self._redact(value)
+        if isinstance(value, list):
+            return [self._redact_json(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self._redact_json(item) for key, item in value.items()}
+        return value
+
+    def _redact_body(self, body: bytes) -> str:
+        """Return the body to store, with secrets masked."""
+        text = body.decode("utf-8", errors="replace")
+        try:
+            data = json.loads(text)
+        except ValueError:
+            # HTML страниц входа: приложение читает из них только статус
+            return self._redact(text)
+
+        redacted = json.dumps(self._redact_json(data), ensure_ascii=False)
+        # Запись, которую нельзя воспроизвести, не сохраняем
+        try:
+            json.loads(redacted)
+        except ValueError as err:
+            raise ValueError(f"Redacted JSON body is not valid: {err}") from err
+        return redacted
+
+    def record(
+        self,
+        method: str,
+        url: str,
+        params: dict[str, Any] | None,
+        response: aiohttp.ClientResponse,
+        body: bytes,
+    ) -> None:
+        """Store one exchange (redacted)."""
+        now = self.clock()
+        if self._recorded_at is None:
+            self._recorded_at = now
+
+        self._interactions.append(
+            {
+                "key": _request_key(method, url, params),
+                "time": now.isoformat(),
+                "status": response.status,
+                "headers": {
+                    key: self._redact(value)
+                    for key, value in response.headers.items()
+                    if key.lower() not in DROPPED_HEADERS
+                },
+                "cookies": _recorded_cookies(response.cookies),
+                "body": self._redact_body(body),
+            }
+        )
+
+    def recording_session(self, session: aiohttp.ClientSession) -> RecordingSession:
+        """Wrap a real session so that its exchanges are recorded."""
+        return RecordingSession(self, session)
+
+    def replay_session(self) -> ReplaySession:
+        """Return a session answering from the recorded exchanges."""
+        queues: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        for interaction in self._interactions:
+            queues[interaction["key"]].append(interaction)
+        return ReplaySession(queues, self._replayed)
+
+    def _replayed(self, interaction: dict[str, Any]) -> None:
+        """Move the simulated clock to the time of a replayed response."""
+        if self._simulated is not None and "time" in interaction:
+            self._simulated.advance_to(datetime.fromisoformat(interaction["time"]))
+
+
+class _RequestContext:
+    """Awaitable and async context manager, like aiohttp's request result."""
+
+    def __init__(self, coro) -> None:
+        self._coro = coro
+        self._response: Any = None
+
+    def __await__(self):
+        return self._coro.__await__()
+
+    async def __aenter__(self):
+        self._response = await self._coro
+        return self._response
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._response.release()
+
+
+class RecordingSession:
+    """aiohttp session proxy recording every response."""
+
+    def __init__(self, cassette: EmaktabCassette, session: aiohttp.ClientSession) -> None:
+        self._cassette = cassette
+        self._session = session
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._session, name)
+
+    async def _request(self, method: str, url: str, **kwargs: Any):
+        response = await self._session.request(method, url, **kwargs)
+        body = await response.read()
+        self._cassette.record(method, str(url), kwargs.get("params"), response, body)
+        return response
+
+    def get(self, url: str, **kwargs: Any) -> _RequestContext:
+        return _RequestContext(self._request("GET", url, **kwargs))
+
+    def post(self, url: str, **kwargs: Any) -> _RequestContext:
+        return _RequestContext(self._request("POST", url, **kwargs))
+
+    async def close(self) -> None:
+        self._cassette.save()
+        await self._session.close()
+
+
+class ReplayResponse:
+    """Minimal stand-in for aiohttp.ClientResponse."""
+
+    def __init__(self, interaction: dict[str, Any]) -> None:
+        self.status: int = interaction["status"]
+        self.headers = CIMultiDictProxy(CIMultiDict(interaction["headers"]))
+        self._body: bytes = interaction["body"].encode("utf-8")
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self, encoding: str = "utf-8") -> str:
+        return self._body.decode(encoding)
+
+    async def json(self, **kwargs: Any) -> Any:
+        return json.loads(self._body)
+
+    def release(self) -> None:
+        """Nothing to release."""
+
+
+class ReplaySession:
+    """Session replaying recorded responses in order.
+
+    Requests are matched by method, URL and query (without volatile
+    parameters). Repeated requests get the recorded responses in order;
+    once they run out the last one is repeated.
+    """
+
+    def __init__(
+        self,
+        queues: dict[str, list[dict[str, Any]]],
+        on_replay: Callable[[dict[str, Any]], None] | None = None,
+    ) -> None:
+        self._queues = queues
+        self._positions: dict[str, int] = defaultdict(int)
+        self._on_replay = on_replay
+        self.cookie_jar = aiohttp.CookieJar(unsafe=True)
+        self.closed = False
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> ReplayResponse:
+        key = _request_key(method, str(url), kwargs.get("params"))
+        queue = self._queues.get(key)
+        if not queue:
+            raise CassetteMiss(f"No recorded response for {key}")
+
+        position = self._positions[key]
+        interaction = queue[min(position, len(queue) - 1)]
+        self._positions[key] = position + 1
+
+        if interaction["cookies"]:
+            self.cookie_jar.update_cookies(
+                _replay_cookies(interaction["cookies"]),
+                URL(str(url)),
+            )
+
+        if self._on_replay is not None:
+            self._on_replay(interaction)
+
+        return ReplayResponse(interaction)
+
+    def get(self, url: str, **kwargs: Any) -> _RequestContext:
+        return _RequestContext(self._request("GET", url, **kwargs))
+
+    def post(self, url: str, **kwargs: Any) -> _RequestContext:
+        return _RequestContext(self._request("POST", url, **kwargs))
+
+    async def close(self) -> None:
+        self.closed = True
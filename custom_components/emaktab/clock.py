@@ -0,0 +1,162 @@
+"""School-day clock for eMaktab (Home Assistant timezone).
+
+Days and weeks roll over at local midnight, not at UTC midnight: in
+Uzbekistan (UTC+5) the UTC date lags five hours behind. Diary days keep
+being labelled by the UTC date of their timestamp (eMaktab stores them as
+UTC midnight of the school day), so only the choice of "today" and of the
+current week depends on the timezone.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_CLOCK
+from .diary import week_start
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def local_date(moment: datetime) -> date:
+    """Return date of a moment in the Home Assistant timezone."""
+    return dt_util.as_local(moment).date()
+
+
+def week_range_utc(day: date) -> tuple[int, int]:
+    """Return API range (Mon 00:00 - Sun 23:59:59 UTC) of the day's week."""
+    monday = week_start(day)
+    start = datetime(monday.year, monday.month, monday.day, tzinfo=timezone.utc)
+    end = start + timedelta(days=7) - timedelta(seconds=1)
+    return int(start.timestamp()), int(end.timestamp())
+
+
+class EmaktabClock:
+    """Local today/week, cached until the next local midnight.
+
+    Listeners are called at every local midnight with a flag telling
+    whether a new week has started. `source` replaces the real clock
+    (e.g. the simulated clock of a replayed cassette); such a clock has no
+    timer, its values are only refreshed when read.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        source: Callable[[], datetime] | None = None,
+    ) -> None:
+        self._hass = hass
+        self._source = source or dt_util.utcnow
+        self._simulated = source is not None
+        self._listeners: list[Callable[[bool], None]] = []
+        self._unsub: CALLBACK_TYPE | None = None
+
+        self._today: date | None = None
+        self._week_start: date | None = None
+        self._next_boundary: datetime | None = None
+        # Неделя, о которой слушатели уже знают
+        self._notified_week: date | None = None
+
+    def now(self) -> datetime:
+        """Return current moment (UTC)."""
+        return self._source()
+
+    @property
+    def today(self) -> date:
+        """Return local date."""
+        self._ensure_current()
+        assert self._today is not None
+        return self._today
+
+    @property
+    def week_start(self) -> date:
+        """Return Monday of the local week."""
+        self._ensure_current()
+        assert self._week_start is not None
+        return self._week_start
+
+    @property
+    def next_boundary(self) -> datetime:
+        """Return next local midnight (UTC)."""
+        self._ensure_current()
+        assert self._next_boundary is not None
+        return self._next_boundary
+
+    def _ensure_current(self) -> None:
+        # Таймер сбрасывает кэш ровно на границе; сравнение страхует
+        # подменённый источник времени и запоздавший таймер
+        if self._next_boundary is None or self.now() >= self._next_boundary:
+            self._recompute()
+
+    def _recompute(self) -> None:
+        today = local_date(self.now())
+        self._today = today
+        self._week_start = week_start(today)
+        self._next_boundary = dt_util.as_utc(
+            dt_util.start_of_local_day(today + timedelta(days=1))
+        )
+
+    @callback
+    def async_add_listener(self, listener: Callable[[bool], None]) -> CALLBACK_TYPE:
+        """Call listener(week_changed) at every local midnight."""
+        self._listeners.append(listener)
+        if self._notified_week is None:
+            self._notified_week = self.week_start
+        if self._unsub is None:
+            self._schedule()
+
+        @callback
+        def _remove() -> None:
+            self._listeners.remove(listener)
+            if not self._listeners:
+                self._notified_week = None
+                if self._unsub is not None:
+                    self._unsub()
+                    self._unsub = None
+
+        return _remove
+
+    @callback
+    def _schedule(self) -> None:
+        # Таймер идёт по реальному времени — для подменённых часов не нужен
+        if self._simulated:
+            return
+        self._unsub = async_track_point_in_utc_time(
+            self._hass,
+            self._async_rollover,
+            self.next_boundary,
+        )
+
+    @callback
+    def _async_rollover(self, _now: datetime) -> None:
+        """Handle local midnight."""
+        self._unsub = None
+        self._recompute()
+
+        week_changed = self._week_start != self._notified_week
+        self._notified_week = self._week_start
+
+        _LOGGER.debug(
+            "School day rolled over to %s (new week: %s)",
+            self._today,
+            week_changed,
+        )
+
+        for listener in list(self._listeners):
+            listener(week_changed)
+
+        if self._listeners:
+            self._schedule()
+
+
+def async_get_clock(hass: HomeAssistant) -> EmaktabClock:
+    """Return the clock shared by all config entries."""
+    clock: EmaktabClock | None = hass.data.get(DATA_CLOCK)
+    if clock is None:
+        clock = hass.data[DATA_CLOCK] = EmaktabClock(hass)
+    return clock
@@ -7,15 +7,45 @@ import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_NAME, CONF_USERNAME, CONF_PASSWORD
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
 
 from .api import EmaktabApiClient
 from .auth import EmaktabAuthManager
-from .const import DOMAIN
+from .const import (
+    CONF_DIARY_CONNECT_TIMEOUT,
+    CONF_DIARY_READ_TIMEOUT,
+    CONF_DIARY_TOTAL_TIMEOUT,
+    CONF_LEAN_LOGIN,
+    CONF_LOGIN_CONNECT_TIMEOUT,
+    CONF_LOGIN_READ_TIMEOUT,
+    CONF_LOGIN_TOTAL_TIMEOUT,
+    CONF_REFRESH_DEADLINE,
+    DEFAULT_DIARY_CONNECT_TIMEOUT,
+    DEFAULT_DIARY_READ_TIMEOUT,
+    DEFAULT_DIARY_TOTAL_TIMEOUT,
+    DEFAULT_LEAN_LOGIN,
+    DEFAULT_LOGIN_CONNECT_TIMEOUT,
+    DEFAULT_LOGIN_READ_TIMEOUT,
+    DEFAULT_LOGIN_TOTAL_TIMEOUT,
+    DEFAULT_REFRESH_DEADLINE,
+    DOMAIN,
+)
+from .ratelimit import async_get_rate_limiter
 
 _LOGGER = logging.getLogger(__name__)
 
+# Таймауты в секундах: (ключ, значение по умолчанию)
+TIMEOUT_OPTIONS = (
+    (CONF_LOGIN_CONNECT_TIMEOUT, DEFAULT_LOGIN_CONNECT_TIMEOUT),
+    (CONF_LOGIN_READ_TIMEOUT, DEFAULT_LOGIN_READ_TIMEOUT),
+    (CONF_LOGIN_TOTAL_TIMEOUT, DEFAULT_LOGIN_TOTAL_TIMEOUT),
+    (CONF_DIARY_CONNECT_TIMEOUT, DEFAULT_DIARY_CONNECT_TIMEOUT),
+    (CONF_DIARY_READ_TIMEOUT, DEFAULT_DIARY_READ_TIMEOUT),
+    (CONF_DIARY_TOTAL_TIMEOUT, DEFAULT_DIARY_TOTAL_TIMEOUT),
+    (CONF_REFRESH_DEADLINE, DEFAULT_REFRESH_DEADLINE),
+)
+
 CONF_PERSON_ID = "person_id"
 CONF_SCHOOL_ID = "school_id"
 
@@ -25,6 +55,14 @@ class EmaktabConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> EmaktabOptionsFlow:
+        """Return the options flow."""
+        return EmaktabOptionsFlow(config_entry)
+
     async def async_step_user(
         self,
         user_input: dict[str, Any] | None = None,
@@ -74,6 +112,7 @@ class EmaktabConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         auth = EmaktabAuthManager(
             data[CONF_USERNAME],
             data[CONF_PASSWORD],
+            rate_limiter=async_get_rate_limiter(hass),
         )
         await auth.async_login()
 
@@ -91,6 +130,40 @@ class EmaktabConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         await auth.async_close()
 
 
+class EmaktabOptionsFlow(config_entries.OptionsFlow):
+    """Options flow for eMaktab."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        self._entry = config_entry
+
+    async def async_step_init(
+        self,
+        user_input: dict[str, Any] | None = None,
+    ):
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+
+        data_schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_LEAN_LOGIN,
+                    default=options.get(CONF_LEAN_LOGIN, DEFAULT_LEAN_LOGIN),
+                ): bool,
+                **{
+                    vol.Optional(key, default=options.get(key, default)): vol.All(
+                        vol.Coerce(int), vol.Range(min=1, max=600)
+                    )
+                    for key, default in TIMEOUT_OPTIONS
+                },
+            }
+        )
+
+        return self.async_show_form(step_id="init", data_schema=data_schema)
+
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
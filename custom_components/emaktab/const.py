@@ -3,7 +3,7 @@
 DOMAIN = "emaktab"
 
 # Platforms
-PLATFORMS = ["sensor", "button"]
+PLATFORMS = ["sensor", "button", "calendar", "todo"]
 
 # Configuration keys
 CONF_USERNAME = "username"
@@ -12,6 +12,20 @@ CONF_PERSON_ID = "person_id"
 CONF_SCHOOL_ID = "school_id"
 CONF_GROUP_ID = "group_id"
 CONF_SCAN_INTERVAL = "scan_interval"
+CONF_LEAN_LOGIN = "lean_login"
+CONF_LOGIN_CONNECT_TIMEOUT = "login_connect_timeout"
+CONF_LOGIN_READ_TIMEOUT = "login_read_timeout"
+CONF_LOGIN_TOTAL_TIMEOUT = "login_total_timeout"
+CONF_DIARY_CONNECT_TIMEOUT = "diary_connect_timeout"
+CONF_DIARY_READ_TIMEOUT = "diary_read_timeout"
+CONF_DIARY_TOTAL_TIMEOUT = "diary_total_timeout"
+CONF_REFRESH_DEADLINE = "refresh_deadline"
+
+# Domain-level (YAML) configuration keys
+CONF_LOGIN_RATE = "login_rate"
+CONF_LOGIN_BURST = "login_burst"
+CONF_API_RATE = "api_rate"
+CONF_API_BURST = "api_burst"
 
 # URLs
 LOGIN_URL = "https://login.emaktab.uz/login"
@@ -25,7 +39,59 @@ COOKIE_SESSION = "session_uuid"
 
 # Defaults
 DEFAULT_SCAN_INTERVAL = 3600  # seconds
-REQUEST_TIMEOUT = 30  # seconds
+DEFAULT_LEAN_LOGIN = False
+LEAN_LOGIN_MAX_REDIRECTS = 3
+# Session default, seconds; login and diary requests pass their own timeouts,
+# which replace it (they are not capped by it)
+REQUEST_TIMEOUT = 30
+
+# Per-phase timeouts, seconds
+DEFAULT_LOGIN_CONNECT_TIMEOUT = 10
+DEFAULT_LOGIN_READ_TIMEOUT = 10
+DEFAULT_LOGIN_TOTAL_TIMEOUT = 20
+DEFAULT_DIARY_CONNECT_TIMEOUT = 10
+DEFAULT_DIARY_READ_TIMEOUT = 15
+DEFAULT_DIARY_TOTAL_TIMEOUT = 30
+DEFAULT_REFRESH_DEADLINE = 90  # whole refresh, excluding rate limiter queueing
+JSON_EXECUTOR_THRESHOLD = 256 * 1024  # bytes; larger bodies decode in executor
+SCHEDULER_JITTER = 0.1  # fraction of a refresh slot
+REFRESH_RETRY_DELAYS = (30, 120, 600)  # seconds, after a failed one-off refresh
+ROLLOVER_REFRESH_SPREAD = 600  # seconds over which new-week refreshes are spread
+STARTUP_REFRESH_SPREAD = 60  # seconds over which startup refreshes are spread
+CALENDAR_MAX_WEEKS = 12  # extra weeks kept in memory for the calendar
+CALENDAR_WEEK_TTL = DEFAULT_SCAN_INTERVAL  # extra week is re-fetched when viewed after this
+CALENDAR_RETRY_DELAY = 300  # seconds before retrying a failed week (doubles, capped)
+CALENDAR_RETRY_MAX = 3600
+WS_MAX_PAGE_SIZE = 100  # days per websocket page
+
+# Rate limits (shared by all entries; overridable in YAML)
+LOGIN_RATE_LIMIT = 0.5  # requests per second
+LOGIN_RATE_BURST = 3  # one full login flow
+API_RATE_LIMIT = 1.0  # requests per second
+API_RATE_BURST = 5
+
+# Storage
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.snapshot"  # suffixed with entry_id
+SNAPSHOT_SAVE_DELAY = 10  # seconds
+TODO_STORAGE_KEY = f"{DOMAIN}.todo"  # suffixed with entry_id
+TODO_SAVE_DELAY = 5  # seconds
+MARKS_STORAGE_KEY = f"{DOMAIN}.marks"  # shared by all entries
+MARKS_SAVE_DELAY = 30  # seconds
+MARKS_BACKFILL_MAX_WEEKS = 260  # about five school years
+
+# hass.data keys (outside hass.data[DOMAIN], which is keyed by entry_id)
+DATA_RATE_LIMITER = f"{DOMAIN}_rate_limiter"
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+DATA_MARK_HISTORY = f"{DOMAIN}_mark_history"
+DATA_CLOCK = f"{DOMAIN}_clock"
+
+# Services
+SERVICE_MARK_REPORT = "mark_report"
+
+# Dispatcher signals (payload: entry_id)
+SIGNAL_ENTRY_CHANGED = f"{DOMAIN}_entry_changed"  # entry set up or unloaded
+SIGNAL_ENTRY_REMOVED = f"{DOMAIN}_entry_removed"
 
 # Headers
 DEFAULT_USER_AGENT = (
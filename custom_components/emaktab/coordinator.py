@@ -2,18 +2,34 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from datetime import datetime, timezone
+import time
+from datetime import date, datetime, timedelta
 from typing import Any
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
 
 from .api import EmaktabApiClient
-from .const import DOMAIN, DEFAULT_SCAN_INTERVAL
+from .clock import EmaktabClock
+from .const import (
+    DOMAIN,
+    CALENDAR_MAX_WEEKS,
+    CALENDAR_RETRY_DELAY,
+    CALENDAR_RETRY_MAX,
+    CALENDAR_WEEK_TTL,
+    DEFAULT_REFRESH_DEADLINE,
+    SNAPSHOT_SAVE_DELAY,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+)
+from .diary import week_start
+from .ratelimit import exclude_queue_time
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -28,45 +44,288 @@ class EmaktabCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         person_id: str,
         school_id: str,
         group_id: str,
-        scan_interval: int = DEFAULT_SCAN_INTERVAL,
+        entry_id: str | None = None,
+        refresh_deadline: float = DEFAULT_REFRESH_DEADLINE,
+        clock: EmaktabClock | None = None,
     ) -> None:
         self._api = api
+        # Локальные "сегодня" и неделя (часовой пояс Home Assistant)
+        self._clock = clock or EmaktabClock(hass, source=api.now)
         self._person_id = person_id
         self._school_id = school_id
         self._group_id = group_id  # пока не используется в v2 diary
+        self._refresh_deadline = refresh_deadline
+
+        # Дополнительные недели (календарь), ещё не загруженные
+        self._pending_weeks: set[date] = set()
+        # Неудачные недели: monday -> (не раньше чем, число неудач подряд)
+        self._week_backoff: dict[date, tuple[float, int]] = {}
+        # Прошлые недели для истории оценок, по CALENDAR_MAX_WEEKS за обновление
+        self._backfill: list[date] = []
+
+        # Снимок последних успешных данных (для быстрого старта)
+        self._store: Store | None = None
+        if entry_id is not None:
+            self._store = Store(
+                hass,
+                STORAGE_VERSION,
+                f"{STORAGE_KEY}.{entry_id}",
+            )
 
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=None,  # интервал уже задан ранее через timedelta в предыдущих правках
+            update_interval=None,  # обновления планирует EmaktabRefreshScheduler
         )
 
         # Хранилище состояния
         self.data = {
             "days": [],
+            "weeks": {},
+            "weeks_updated": {},  # monday -> ISO time of the last fetch
             "last_update": None,
             "error": None,
+            "stale": False,
+        }
+
+    def now(self) -> datetime:
+        """Return current moment (UTC) according to the clock."""
+        return self._clock.now()
+
+    @property
+    def today(self) -> date:
+        """Return local school day date."""
+        return self._clock.today
+
+    @callback
+    def async_handle_rollover(self, week_changed: bool) -> None:
+        """Handle local midnight (called by EmaktabClock).
+
+        Sensors re-select today's day. On a new week the cached current
+        week is replaced by the prefetched one (if any); the refresh of the
+        new week is scheduled by EmaktabRefreshScheduler. The previous week
+        is fetched once more with it, to pick up marks entered late.
+        """
+        if week_changed:
+            current = self._clock.week_start
+            self.data["days"] = self.data["weeks"].get(current.isoformat(), [])
+
+            previous = current - timedelta(weeks=1)
+            self.data["weeks_updated"].pop(previous.isoformat(), None)
+            self._pending_weeks.add(previous)
+
+        self.async_update_listeners()
+
+    async def async_load_snapshot(self) -> bool:
+        """Restore last good data from storage and mark it stale."""
+        if self._store is None:
+            return False
+
+        try:
+            snapshot = await self._store.async_load()
+        except Exception as err:
+            _LOGGER.warning("Failed to load eMaktab snapshot: %s", err)
+            return False
+
+        if not isinstance(snapshot, dict) or not isinstance(
+            snapshot.get("days"), list
+        ):
+            return False
+
+        self.data["days"] = snapshot["days"]
+        weeks = snapshot.get("weeks")
+        self.data["weeks"] = weeks if isinstance(weeks, dict) else {}
+        updated = snapshot.get("weeks_updated")
+        self.data["weeks_updated"] = updated if isinstance(updated, dict) else {}
+        self.data["last_update"] = snapshot.get("last_update")
+        self.data["error"] = None
+        self.data["stale"] = True
+
+        _LOGGER.debug(
+            "eMaktab snapshot restored: days_count=%s, last_update=%s",
+            len(self.data["days"]),
+            self.data["last_update"],
+        )
+        return True
+
+    def _snapshot(self) -> dict[str, Any]:
+        return {
+            "days": self.data["days"],
+            "weeks": self.data["weeks"],
+            "weeks_updated": self.data["weeks_updated"],
+            "last_update": self.data["last_update"],
         }
 
+    def _week_fresh(self, monday: date) -> bool:
+        """Return True if the week is cached and younger than the TTL."""
+        key = monday.isoformat()
+        if key not in self.data["weeks"]:
+            return False
+
+        try:
+            updated = datetime.fromisoformat(self.data["weeks_updated"][key])
+        except (KeyError, TypeError, ValueError):
+            return False
+
+        return self.now() - updated < timedelta(seconds=CALENDAR_WEEK_TTL)
+
+    def missing_weeks(self, start: date, end: date) -> list[date]:
+        """Return Mondays of weeks in [start, end] to fetch.
+
+        A week is missing if it is not cached or its cache expired (marks
+        and homework can be added later). The current week is refreshed by
+        the regular update and is missing only until first loaded.
+        """
+        current = self._clock.week_start
+        missing: list[date] = []
+
+        monday = week_start(start)
+        while monday <= end:
+            if monday == current:
+                if monday.isoformat() not in self.data["weeks"]:
+                    missing.append(monday)
+            elif not self._week_fresh(monday):
+                missing.append(monday)
+            monday = date.fromordinal(monday.toordinal() + 7)
+
+        return missing
+
+    @callback
+    def async_request_weeks(self, weeks: list[date]) -> None:
+        """Queue additional weeks to be fetched on the next refresh.
+
+        Weeks are loaded by the regular update (same rate limiting and
+        error handling); at most CALENDAR_MAX_WEEKS are kept in memory.
+        Weeks that failed recently are skipped until their backoff ends.
+        """
+        now = time.monotonic()
+        new = [
+            w
+            for w in weeks
+            if w not in self._pending_weeks
+            and self._week_backoff.get(w, (0.0, 0))[0] <= now
+        ]
+        if not new:
+            return
+
+        self._pending_weeks.update(new[:CALENDAR_MAX_WEEKS])
+        self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def async_backfill(self, weeks: int) -> None:
+        """Fetch the given number of past weeks for the mark history.
+
+        Weeks go through the regular update in chunks of
+        CALENDAR_MAX_WEEKS (one chunk per refresh), so each chunk is added
+        to the mark history before it is evicted from memory.
+        """
+        current = self._clock.week_start
+        self._backfill = [current - timedelta(weeks=i) for i in range(1, weeks + 1)]
+        _LOGGER.debug("eMaktab backfill of %s weeks queued", weeks)
+        self._async_backfill_next()
+
+    @callback
+    def _async_backfill_next(self) -> None:
+        """Queue the next chunk of backfill weeks."""
+        if not self._backfill:
+            return
+
+        chunk = self._backfill[:CALENDAR_MAX_WEEKS]
+        del self._backfill[:CALENDAR_MAX_WEEKS]
+        self.async_request_weeks(chunk)
+
+    async def _async_fetch_pending_weeks(self, current: date) -> None:
+        """Fetch queued extra weeks, dropping the oldest beyond the limit."""
+        weeks: dict[str, list[dict[str, Any]]] = self.data["weeks"]
+        updated: dict[str, str] = self.data["weeks_updated"]
+        pending = sorted(self._pending_weeks)
+        self._pending_weeks.clear()
+
+        for monday in pending:
+            if monday == current or self._week_fresh(monday):
+                continue
+
+            try:
+                result = await self._api.async_get_diary(
+                    person_id=self._person_id,
+                    school_id=self._school_id,
+                    when=monday,
+                )
+            except Exception as err:
+                # Не повторяем неудачную неделю при каждой перерисовке календаря
+                failures = self._week_backoff.get(monday, (0.0, 0))[1] + 1
+                delay = min(
+                    CALENDAR_RETRY_MAX,
+                    CALENDAR_RETRY_DELAY * 2 ** (failures - 1),
+                )
+                self._week_backoff[monday] = (time.monotonic() + delay, failures)
+                _LOGGER.warning(
+                    "Failed to fetch eMaktab diary for week %s: %s "
+                    "(next attempt in %s s)",
+                    monday,
+                    err,
+                    delay,
+                )
+                continue
+
+            self._week_backoff.pop(monday, None)
+            days = result.get("days", []) if isinstance(result, dict) else []
+            key = monday.isoformat()
+            weeks.pop(key, None)
+            weeks[key] = days
+            updated[key] = self.now().isoformat()
+
+        # Текущая неделя + не более CALENDAR_MAX_WEEKS дополнительных
+        # (dict сохраняет порядок вставки — удаляем самые старые запросы)
+        extra = [key for key in weeks if key != current.isoformat()]
+        for key in extra[: max(0, len(extra) - CALENDAR_MAX_WEEKS)]:
+            del weeks[key]
+            updated.pop(key, None)
+
     async def _async_update_data(self) -> dict[str, Any]:
         """Fetch diary data from v2 API."""
-        now = datetime.now(timezone.utc).astimezone()
+        now = self.now().astimezone()
+        deadline = asyncio.timeout(self._refresh_deadline)
 
         try:
             _LOGGER.info("Updating eMaktab diary data (v2)")
 
-            result = await self._api.async_get_diary(
-                person_id=self._person_id,
-                school_id=self._school_id,
-            )
+            # Общий дедлайн на всё обновление: зависший запрос отменяется,
+            # а не держит обновление (и кнопку) до исчерпания таймаутов.
+            # Ожидание в очереди общего лимита в дедлайн не входит
+            with exclude_queue_time(deadline):
+                async with deadline:
+                    current = self._clock.week_start
+                    result = await self._api.async_get_diary(
+                        person_id=self._person_id,
+                        school_id=self._school_id,
+                        when=current,
+                    )
 
-            # Ожидаем структуру: { "days": [...] }
-            days = result.get("days", []) if isinstance(result, dict) else []
+                    # Ожидаем структуру: { "days": [...] }
+                    days = (
+                        result.get("days", []) if isinstance(result, dict) else []
+                    )
+
+                    self.data["days"] = days
+                    self.data["weeks"].pop(current.isoformat(), None)
+                    self.data["weeks"][current.isoformat()] = days
+                    self.data["weeks_updated"][current.isoformat()] = (
+                        self.now().isoformat()
+                    )
+
+                    await self._async_fetch_pending_weeks(current)
 
-            self.data["days"] = days
             self.data["last_update"] = now.isoformat()
             self.data["error"] = None
+            self.data["stale"] = False
+
+            if self._store is not None:
+                self._store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+
+            # Следующая порция истории — после того как эта будет учтена
+            self._async_backfill_next()
 
             _LOGGER.debug(
                 "eMaktab diary updated: days_count=%s",
@@ -75,6 +334,15 @@ class EmaktabCoordinator(DataUpdateCoordinator[dict[str, Any]]):
 
             return self.data
 
+        except TimeoutError as err:
+            if deadline.expired():
+                message = f"Refresh deadline of {self._refresh_deadline} s exceeded"
+            else:
+                message = "eMaktab request timed out"
+            self.data["error"] = message
+            _LOGGER.warning("Failed to update eMaktab diary data: %s", message)
+            raise UpdateFailed(message) from err
+
         except Exception as err:
             self.data["error"] = str(err)
             _LOGGER.error("Failed to update eMaktab diary data: %s", err)
@@ -0,0 +1,109 @@
+"""Helpers for working with eMaktab diary payloads."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Iterator
+
+
+def day_date(day: dict[str, Any]) -> date | None:
+    """Return calendar date of a diary day (timestamp is UTC midnight)."""
+    try:
+        return datetime.fromtimestamp(int(day["date"]), tz=timezone.utc).date()
+    except (KeyError, TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def week_start(value: date) -> date:
+    """Return Monday of the week containing the given date."""
+    return value - timedelta(days=value.weekday())
+
+
+def iter_days(data: dict[str, Any]) -> Iterator[tuple[date, dict[str, Any]]]:
+    """Yield (date, day) for every cached day, each date once.
+
+    Days of the current week come first, then days of additionally
+    fetched weeks.
+    """
+    seen: set[date] = set()
+
+    weeks = data.get("weeks") or {}
+    for days in (data.get("days") or [], *weeks.values()):
+        for day in days:
+            when = day_date(day)
+            if when is None or when in seen:
+                continue
+            seen.add(when)
+            yield when, day
+
+
+def normalize_lessons(day: dict[str, Any]) -> list[dict[str, Any]]:
+    """Normalize eMaktab lessons to internal standard."""
+    normalized: list[dict[str, Any]] = []
+
+    for lesson in day.get("lessons", []):
+        if lesson.get("isEmpty"):
+            continue
+
+        # Первая оценка (если есть)
+        mark_obj = None
+        work_marks = lesson.get("workMarks") or []
+        if work_marks:
+            first_work = work_marks[0]
+            marks = first_work.get("marks") or []
+            if marks:
+                mark_obj = {
+                    "value": marks[0].get("value"),
+                    "reason": first_work.get("workName"),
+                }
+
+        normalized.append(
+            {
+                "lesson": lesson.get("number"),
+                "subject": lesson.get("subject", {}).get("name"),
+                "topic": lesson.get("theme"),
+                "homework": (lesson.get("homework") or {}).get("text"),
+                "mark": mark_obj,
+            }
+        )
+
+    return normalized
+
+
+def normalize_day(when: date, day: dict[str, Any]) -> dict[str, Any]:
+    """Normalize a whole diary day (used by the websocket API)."""
+    lessons = normalize_lessons(day)
+
+    return {
+        "date": when.isoformat(),
+        "lesson_count": len(lessons),
+        "lessons": lessons,
+        "homework": [
+            {
+                "lesson": lesson["lesson"],
+                "subject": lesson["subject"],
+                "text": lesson["homework"],
+            }
+            for lesson in lessons
+            if lesson["homework"]
+        ],
+        "marks": [
+            {
+                "lesson": lesson["lesson"],
+                "subject": lesson["subject"],
+                **lesson["mark"],
+            }
+            for lesson in lessons
+            if lesson["mark"]
+        ],
+        "important_works": day.get("importantWorks") or [],
+    }
+
+
+DAY_FIELDS = (
+    "lesson_count",
+    "lessons",
+    "homework",
+    "marks",
+    "important_works",
+)
@@ -0,0 +1,247 @@
+"""Shared rate limiter for eMaktab traffic."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Iterator
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    API_RATE_BURST,
+    API_RATE_LIMIT,
+    DATA_RATE_LIMITER,
+    LOGIN_RATE_BURST,
+    LOGIN_RATE_LIMIT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Дедлайн обновления текущей задачи: на время ожидания в очереди он
+# приостанавливается, иначе при большом числе детей обновления
+# упираются в дедлайн, стоя в очереди, а не в сети
+_deadline: ContextVar[asyncio.Timeout | None] = ContextVar(
+    "emaktab_refresh_deadline",
+    default=None,
+)
+
+
+@contextlib.contextmanager
+def exclude_queue_time(deadline: asyncio.Timeout) -> Iterator[None]:
+    """Pause `deadline` while the current task waits for a token."""
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class TokenBucket:
+    """Token bucket with fair (round-robin) queuing between accounts.
+
+    Requests are granted immediately while tokens are available and
+    nobody is waiting. Otherwise the caller is queued under its key and
+    waiting keys are served one request at a time in turn, so a single
+    account cannot starve the others.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+
+        self._name = name
+        self._rate = rate
+        self._capacity = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+        self._queues: dict[str, deque[asyncio.Future[None]]] = {}
+        self._order: deque[str] = deque()
+        self._timer: asyncio.TimerHandle | None = None
+
+    @property
+    def waiting(self) -> int:
+        """Return number of queued requests."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def async_acquire(self, key: str) -> None:
+        """Wait until a request for the given account may be sent."""
+        self._refill()
+
+        if not self._queues and self._available() and self._tokens >= 1:
+            self._tokens -= 1
+            return
+
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = loop.create_future()
+
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque()
+            self._order.append(key)
+        queue.append(future)
+
+        _LOGGER.debug(
+            "Rate limiter %s: queued request for %s (waiting=%s)",
+            self._name,
+            key,
+            self.waiting,
+        )
+
+        self._schedule()
+
+        deadline = _deadline.get()
+        remaining: float | None = None
+        if deadline is not None and not deadline.expired():
+            when = deadline.when()
+            if when is not None:
+                remaining = when - loop.time()
+                deadline.reschedule(None)
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Token was granted right before cancellation, give it back
+                self._tokens = min(self._capacity, self._tokens + 1)
+                self._schedule()
+            else:
+                self._discard(key, future)
+            raise
+        finally:
+            if deadline is not None and remaining is not None:
+                deadline.reschedule(loop.time() + max(0.0, remaining))
+
+    def penalize(self, seconds: float) -> None:
+        """Stop granting requests for a while (e.g. after HTTP 429)."""
+        until = time.monotonic() + seconds
+        if until <= self._blocked_until:
+            return
+
+        _LOGGER.warning(
+            "Rate limiter %s: pausing requests for %.1f s",
+            self._name,
+            seconds,
+        )
+        self._blocked_until = until
+        self._tokens = min(self._tokens, 0.0)
+        self._schedule()
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._blocked_until
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if elapsed > 0:
+            self._tokens = min(self._capacity, self._tokens + elapsed * self._rate)
+
+    def _discard(self, key: str, future: asyncio.Future[None]) -> None:
+        queue = self._queues.get(key)
+        if queue is None:
+            return
+
+        try:
+            queue.remove(future)
+        except ValueError:
+            return
+
+        if not queue:
+            del self._queues[key]
+            self._order.remove(key)
+
+    def _schedule(self) -> None:
+        """Arm the dispatch timer for the next available token."""
+        if self._timer is not None or not self._queues:
+            return
+
+        now = time.monotonic()
+        delay = max(0.0, self._blocked_until - now)
+        if self._tokens < 1:
+            delay = max(delay, (1 - self._tokens) / self._rate)
+
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(delay, self._dispatch)
+
+    def _dispatch(self) -> None:
+        """Grant tokens to waiting accounts in round-robin order."""
+        self._timer = None
+        self._refill()
+
+        while self._order and self._available() and self._tokens >= 1:
+            key = self._order.popleft()
+            queue = self._queues[key]
+            future = queue.popleft()
+
+            if not future.done():
+                future.set_result(None)
+                self._tokens -= 1
+
+            if queue:
+                self._order.append(key)
+            else:
+                del self._queues[key]
+
+        self._schedule()
+
+
+class EmaktabRateLimiter:
+    """Rate limiter shared by every eMaktab entry.
+
+    Login traffic (login.emaktab.uz and the redirect chain) and diary API
+    calls have separate budgets, so re-logins do not eat into the diary
+    budget and vice versa.
+    """
+
+    def __init__(
+        self,
+        login_rate: float = LOGIN_RATE_LIMIT,
+        login_burst: int = LOGIN_RATE_BURST,
+        api_rate: float = API_RATE_LIMIT,
+        api_burst: int = API_RATE_BURST,
+    ) -> None:
+        self.login = TokenBucket("login", login_rate, login_burst)
+        self.api = TokenBucket("api", api_rate, api_burst)
+
+
+@callback
+def async_configure_rate_limiter(
+    hass: HomeAssistant,
+    login_rate: float = LOGIN_RATE_LIMIT,
+    login_burst: int = LOGIN_RATE_BURST,
+    api_rate: float = API_RATE_LIMIT,
+    api_burst: int = API_RATE_BURST,
+) -> EmaktabRateLimiter:
+    """Create the shared rate limiter with the given budgets."""
+    limiter = hass.data[DATA_RATE_LIMITER] = EmaktabRateLimiter(
+        login_rate=login_rate,
+        login_burst=login_burst,
+        api_rate=api_rate,
+        api_burst=api_burst,
+    )
+    _LOGGER.debug(
+        "eMaktab rate limits: login %s/s (burst %s), api %s/s (burst %s)",
+        login_rate,
+        login_burst,
+        api_rate,
+        api_burst,
+    )
+    return limiter
+
+
+@callback
+def async_get_rate_limiter(hass: HomeAssistant) -> EmaktabRateLimiter:
+    """Return the rate limiter shared by all config entries."""
+    limiter: EmaktabRateLimiter | None = hass.data.get(DATA_RATE_LIMITER)
+    if limiter is None:
+        limiter = hass.data[DATA_RATE_LIMITER] = EmaktabRateLimiter()
+    return limiter
@@ -0,0 +1,244 @@
+"""Staggered refresh scheduling for eMaktab coordinators."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import random
+import time
+from typing import Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    DATA_SCHEDULER,
+    DEFAULT_SCAN_INTERVAL,
+    REFRESH_RETRY_DELAYS,
+    ROLLOVER_REFRESH_SPREAD,
+    SCHEDULER_JITTER,
+)
+from .coordinator import EmaktabCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _stable_hash(entry_id: str) -> int:
+    """Return a hash of entry_id that is stable across restarts."""
+    return int.from_bytes(
+        hashlib.sha256(entry_id.encode()).digest()[:8],
+        "big",
+    )
+
+
+class EmaktabRefreshScheduler:
+    """Spread coordinator refreshes evenly across the scan interval.
+
+    Entries are ordered by a stable hash of their entry_id and each one
+    gets its own slot: entry k of n refreshes at offset k * interval / n,
+    aligned to wall-clock time so offsets survive restarts. Every run is
+    additionally delayed by jitter (up to a fraction of the slot width)
+    drawn from a per-entry generator seeded with the same hash, so runs
+    are reproducible. Slots are recomputed whenever an entry is added or
+    removed.
+
+    One-off refreshes (startup, new week) are scheduled separately and
+    retried with increasing delays while they fail, without waiting for
+    the slot. Refreshes due for every entry at once (startup, new week)
+    keep the slot order, compressed into a short window.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        interval: float = DEFAULT_SCAN_INTERVAL,
+        jitter: float = SCHEDULER_JITTER,
+    ) -> None:
+        self._hass = hass
+        self._interval = float(interval)
+        self._jitter = jitter
+        self._coordinators: dict[str, EmaktabCoordinator] = {}
+        self._offsets: dict[str, float] = {}
+        self._rngs: dict[str, random.Random] = {}
+        self._unsubs: dict[str, Callable[[], None]] = {}
+        self._oneoffs: dict[str, Callable[[], None]] = {}
+
+    @property
+    def offsets(self) -> dict[str, float]:
+        """Return current per-entry offsets in seconds."""
+        return dict(self._offsets)
+
+    @callback
+    def async_add(self, entry_id: str, coordinator: EmaktabCoordinator) -> None:
+        """Register a coordinator and rebalance slots."""
+        self._coordinators[entry_id] = coordinator
+        self._rngs[entry_id] = random.Random(_stable_hash(entry_id))
+        self._rebalance()
+
+    @callback
+    def async_remove(self, entry_id: str) -> None:
+        """Unregister a coordinator and rebalance slots."""
+        self._coordinators.pop(entry_id, None)
+        self._cancel(entry_id)
+        self._cancel_oneoff(entry_id)
+        self._offsets.pop(entry_id, None)
+        self._rngs.pop(entry_id, None)
+        self._rebalance()
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel all scheduled refreshes."""
+        for entry_id in list(self._unsubs):
+            self._cancel(entry_id)
+        for entry_id in list(self._oneoffs):
+            self._cancel_oneoff(entry_id)
+
+    @callback
+    def async_refresh_soon(
+        self,
+        entry_id: str,
+        delay: float = 0.0,
+        retries: int = len(REFRESH_RETRY_DELAYS),
+    ) -> None:
+        """Run a one-off refresh after `delay`, retrying while it fails."""
+        if entry_id not in self._coordinators:
+            return
+
+        self._cancel_oneoff(entry_id)
+        self._oneoffs[entry_id] = async_call_later(
+            self._hass,
+            delay,
+            self._make_oneoff(entry_id, retries),
+        )
+
+    @callback
+    def async_refresh_spread(
+        self,
+        entry_id: str,
+        spread: float = ROLLOVER_REFRESH_SPREAD,
+    ) -> None:
+        """Run a one-off refresh at the entry's slot scaled to `spread`.
+
+        Used when all entries need a refresh at the same moment: entry k
+        of n refreshes about k * spread / n seconds later instead of all
+        of them in the same tick.
+        """
+        if entry_id not in self._coordinators:
+            return
+
+        scale = spread / self._interval
+        slot = spread / len(self._coordinators)
+        delay = self._offsets.get(entry_id, 0.0) * scale
+        delay += self._rngs[entry_id].uniform(0, slot * self._jitter)
+        self.async_refresh_soon(entry_id, delay)
+
+    def _make_oneoff(self, entry_id: str, retries: int):
+        @callback
+        def _run(_now) -> None:
+            self._oneoffs.pop(entry_id, None)
+            self._hass.async_create_task(self._async_run_oneoff(entry_id, retries))
+
+        return _run
+
+    async def _async_run_oneoff(self, entry_id: str, retries: int) -> None:
+        coordinator = self._coordinators.get(entry_id)
+        if coordinator is None:
+            return
+
+        await coordinator.async_refresh()
+
+        if coordinator.last_update_success or retries <= 0:
+            return
+        if self._coordinators.get(entry_id) is not coordinator:
+            return  # запись выгружена или перезагружена
+
+        base = REFRESH_RETRY_DELAYS[len(REFRESH_RETRY_DELAYS) - retries]
+        delay = base + self._rngs[entry_id].uniform(0, base * self._jitter)
+        _LOGGER.debug(
+            "eMaktab refresh for entry %s failed, retrying in %.0f s",
+            entry_id,
+            delay,
+        )
+        self.async_refresh_soon(entry_id, delay, retries - 1)
+
+    @callback
+    def _rebalance(self) -> None:
+        """Recompute slot offsets and reschedule every entry."""
+        count = len(self._coordinators)
+        if not count:
+            return
+
+        slot = self._interval / count
+        ordered = sorted(self._coordinators, key=_stable_hash)
+
+        for index, entry_id in enumerate(ordered):
+            offset = index * slot
+            if self._offsets.get(entry_id) == offset and entry_id in self._unsubs:
+                continue
+
+            self._offsets[entry_id] = offset
+            self._schedule(entry_id)
+
+        _LOGGER.debug(
+            "eMaktab refresh slots rebalanced: %s entries, slot=%.1f s",
+            count,
+            slot,
+        )
+
+    @callback
+    def _schedule(self, entry_id: str) -> None:
+        """Schedule the next refresh of an entry at its slot."""
+        self._cancel(entry_id)
+
+        offset = self._offsets[entry_id]
+        slot = self._interval / max(1, len(self._coordinators))
+
+        # Next wall-clock moment t with (t - offset) % interval == 0
+        now = time.time()
+        delay = (offset - now) % self._interval
+        if delay < 1:
+            # Just fired (or clock skew): wait for the next cycle
+            delay += self._interval
+        delay += self._rngs[entry_id].uniform(0, slot * self._jitter)
+
+        self._unsubs[entry_id] = async_call_later(
+            self._hass,
+            delay,
+            self._make_runner(entry_id),
+        )
+
+    def _make_runner(self, entry_id: str):
+        @callback
+        def _run(_now) -> None:
+            self._unsubs.pop(entry_id, None)
+
+            coordinator = self._coordinators.get(entry_id)
+            if coordinator is None:
+                return
+
+            _LOGGER.debug("Scheduled eMaktab refresh for entry %s", entry_id)
+            self._hass.async_create_task(coordinator.async_refresh())
+            self._schedule(entry_id)
+
+        return _run
+
+    @callback
+    def _cancel(self, entry_id: str) -> None:
+        unsub = self._unsubs.pop(entry_id, None)
+        if unsub is not None:
+            unsub()
+
+    @callback
+    def _cancel_oneoff(self, entry_id: str) -> None:
+        unsub = self._oneoffs.pop(entry_id, None)
+        if unsub is not None:
+            unsub()
+
+
+@callback
+def async_get_scheduler(hass: HomeAssistant) -> EmaktabRefreshScheduler:
+    """Return the refresh scheduler shared by all config entries."""
+    scheduler: EmaktabRefreshScheduler | None = hass.data.get(DATA_SCHEDULER)
+    if scheduler is None:
+        scheduler = hass.data[DATA_SCHEDULER] = EmaktabRefreshScheduler(hass)
+    return scheduler
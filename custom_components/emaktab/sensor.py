@@ -3,13 +3,14 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from typing import Any
 
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
+from .diary import normalize_lessons
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
@@ -30,18 +31,19 @@ async def async_setup_entry(
             EmaktabDaySensor(coordinator, entry),
             EmaktabAverageMarkSensor(coordinator, entry),
         ],
-        update_before_add=True,
     )
 
-def _select_relevant_day(days: list[dict[str, Any]]) -> dict[str, Any] | None:
+def _select_relevant_day(
+    days: list[dict[str, Any]],
+    today: date | None = None,
+) -> dict[str, Any] | None:
     """Select ONLY today's day. No fallback to future days."""
     if not days:
         return None
 
-    today = datetime.now(timezone.utc).date()
-    
-    # ВРЕМЕННО: фиксированная дата для тестирования (учебный день)
-    # today = datetime(2025, 11, 13, tzinfo=timezone.utc).date()
+    # Без явной даты — дата UTC (координатор передаёт локальную дату)
+    if today is None:
+        today = datetime.now(timezone.utc).date()
 
     for day in days:
         try:
@@ -58,38 +60,6 @@ def _select_relevant_day(days: list[dict[str, Any]]) -> dict[str, Any] | None:
     # Сегодня данных нет — это допустимое состояние
     return None
 
-def _normalize_lessons(day: dict[str, Any]) -> list[dict[str, Any]]:
-    """Normalize eMaktab lessons to internal standard."""
-    normalized: list[dict[str, Any]] = []
-
-    for lesson in day.get("lessons", []):
-        if lesson.get("isEmpty"):
-            continue
-
-        # Первая оценка (если есть)
-        mark_obj = None
-        work_marks = lesson.get("workMarks") or []
-        if work_marks:
-            first_work = work_marks[0]
-            marks = first_work.get("marks") or []
-            if marks:
-                mark_obj = {
-                    "value": marks[0].get("value"),
-                    "reason": first_work.get("workName"),
-                }
-
-        normalized.append(
-            {
-                "lesson": lesson.get("number"),
-                "subject": lesson.get("subject", {}).get("name"),
-                "topic": lesson.get("theme"),
-                "homework": (lesson.get("homework") or {}).get("text"),
-                "mark": mark_obj,
-            }
-        )
-
-    return normalized
-
 class EmaktabBaseSensor(CoordinatorEntity, SensorEntity):
     """Base class for eMaktab sensors."""
 
@@ -102,7 +72,10 @@ class EmaktabBaseSensor(CoordinatorEntity, SensorEntity):
     @property
     def _day(self) -> dict[str, Any] | None:
         data = self.coordinator.data or {}
-        return _select_relevant_day(data.get("days", []))
+        return _select_relevant_day(
+            data.get("days", []),
+            self.coordinator.today,
+        )
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
@@ -110,6 +83,7 @@ class EmaktabBaseSensor(CoordinatorEntity, SensorEntity):
         attrs = {
             "last_update": data.get("last_update"),
             "error": data.get("error"),
+            "stale": data.get("stale", False),
         }
 
         if not self._day:
@@ -267,13 +241,14 @@ class EmaktabDaySensor(EmaktabBaseSensor, SensorEntity):
             "student": self._entry.title,
             "school_id": self._entry.data.get("school_id"),
             "person_id": self._entry.data.get("person_id"),
+            "stale": (self.coordinator.data or {}).get("stale", False),
         }
 
         day = self._day
         if not day:
             return attrs
 
-        lessons = _normalize_lessons(day)
+        lessons = normalize_lessons(day)
 
         attrs["lesson_count"] = len(lessons)
         attrs["lessons"] = lessons
@@ -300,7 +275,7 @@ class EmaktabAverageMarkSensor(EmaktabBaseSensor, SensorEntity):
 
         marks: list[int] = []
 
-        for lesson in _normalize_lessons(day):
+        for lesson in normalize_lessons(day):
             mark = lesson.get("mark")
             if not mark:
                 continue
@@ -322,6 +297,7 @@ class EmaktabAverageMarkSensor(EmaktabBaseSensor, SensorEntity):
         attrs: dict[str, Any] = {
             "source": "emaktab",
             "student": self._entry.title,
+            "stale": (self.coordinator.data or {}).get("stale", False),
         }
 
         day = self._day
@@ -332,7 +308,7 @@ class EmaktabAverageMarkSensor(EmaktabBaseSensor, SensorEntity):
 
         marks: list[int] = []
 
-        for lesson in _normalize_lessons(day):
+        for lesson in normalize_lessons(day):
             mark = lesson.get("mark")
             if not mark:
                 continue
@@ -0,0 +1,81 @@
+"""Services for eMaktab integration."""
+
+from __future__ import annotations
+
+import logging
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.helpers import config_validation as cv
+
+from .analytics import async_get_mark_history, build_report
+from .const import DOMAIN, MARKS_BACKFILL_MAX_WEEKS, SERVICE_MARK_REPORT
+
+_LOGGER = logging.getLogger(__name__)
+
+MARK_REPORT_SCHEMA = vol.Schema(
+    {
+        vol.Optional("person_id"): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional("start_date"): cv.date,
+        vol.Optional("end_date"): cv.date,
+        vol.Optional("backfill_weeks"): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MARKS_BACKFILL_MAX_WEEKS)
+        ),
+    }
+)
+
+
+@callback
+def async_register_services(hass: HomeAssistant) -> None:
+    """Register eMaktab services."""
+
+    async def _async_mark_report(call: ServiceCall) -> ServiceResponse:
+        """Return mark report for the requested children and period.
+
+        With `backfill_weeks`, past weeks of the children are also queued
+        for loading; their marks appear in later reports.
+        """
+        history = await async_get_mark_history(hass)
+        person_ids = call.data.get("person_id")
+
+        backfill = call.data.get("backfill_weeks")
+        if backfill:
+            for entry in hass.config_entries.async_entries(DOMAIN):
+                if person_ids is not None and (
+                    str(entry.data.get("person_id")) not in person_ids
+                ):
+                    continue
+                data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+                if data:
+                    data["coordinator"].async_backfill(backfill)
+
+        report = await hass.async_add_executor_job(
+            build_report,
+            history.snapshot(),
+            person_ids,
+            call.data.get("start_date"),
+            call.data.get("end_date"),
+        )
+
+        # Имя ребёнка — из заголовка записи
+        for entry in hass.config_entries.async_entries(DOMAIN):
+            child = report["children"].get(str(entry.data.get("person_id")))
+            if child is not None:
+                child["name"] = entry.title
+
+        return report
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_MARK_REPORT,
+        _async_mark_report,
+        schema=MARK_REPORT_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
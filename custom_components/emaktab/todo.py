@@ -0,0 +1,233 @@
+"""Homework to-do list for eMaktab integration."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+from datetime import date
+from typing import Any
+
+from homeassistant.components.todo import (
+    TodoItem,
+    TodoItemStatus,
+    TodoListEntity,
+    TodoListEntityFeature,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN, STORAGE_VERSION, TODO_SAVE_DELAY, TODO_STORAGE_KEY
+from .diary import day_date
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities,
+) -> None:
+    """Set up eMaktab homework list from a config entry."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    coordinator = data["coordinator"]
+
+    store = Store(hass, STORAGE_VERSION, f"{TODO_STORAGE_KEY}.{entry.entry_id}")
+    stored = await store.async_load() or {}
+
+    completed = stored.get("completed") or {}
+    if isinstance(completed, list):
+        # Старый формат (только uid): текст задания неизвестен
+        completed = dict.fromkeys(completed)
+
+    async_add_entities(
+        [
+            EmaktabHomeworkTodoList(
+                coordinator,
+                entry,
+                store,
+                completed,
+            )
+        ]
+    )
+
+
+def _text_hash(text: str) -> str:
+    """Return short hash of homework text (stored with completion marks)."""
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def _homework_items(
+    days: list[dict[str, Any]],
+) -> dict[str, tuple[date, int, str, str]]:
+    """Return uid -> (date, lesson number, subject, text) for all homework.
+
+    uid is built from (date, lesson number, subject), so an item keeps its
+    identity while its text changes.
+    """
+    items: dict[str, tuple[date, int, str, str]] = {}
+
+    for day in days:
+        when = day_date(day)
+        if when is None:
+            continue
+
+        for lesson in day.get("lessons", []):
+            text = (lesson.get("homework") or {}).get("text")
+            if not text:
+                continue
+
+            number = lesson.get("number") or 0
+            subject = (lesson.get("subject") or {}).get("name") or ""
+            uid = f"{when.isoformat()}_{number}_{subject}"
+            items[uid] = (when, number, subject, text)
+
+    return items
+
+
+class EmaktabHomeworkTodoList(CoordinatorEntity, TodoListEntity):
+    """To-do list with homework of the current week.
+
+    Items are synced incrementally: on each refresh only added, changed
+    or removed homework touches the list, and state is written only if
+    something actually changed. Completion marks are kept across
+    refreshes (and restarts) until the homework text changes.
+    """
+
+    _attr_has_entity_name = True
+    _attr_icon = "mdi:book-open-variant"
+    _attr_supported_features = TodoListEntityFeature.UPDATE_TODO_ITEM
+
+    def __init__(
+        self,
+        coordinator,
+        entry,
+        store: Store,
+        completed: dict[str, str | None],
+    ) -> None:
+        super().__init__(coordinator)
+        self._entry = entry
+        self._store = store
+        # uid -> хэш текста, который был отмечен выполненным
+        self._completed = completed
+        self._attr_unique_id = f"{entry.entry_id}_homework"
+        self._attr_name = f"Homework ({entry.title})"
+        self._attr_attribution = "Data provided by eMaktab.uz"
+
+        self._items: dict[str, TodoItem] = {}
+        self._order: dict[str, tuple[date, int]] = {}
+        self._texts: dict[str, str] = {}
+        self._attr_todo_items = []
+        self._was_available: bool | None = None
+        self._sync()
+
+    @property
+    def todo_items(self) -> list[TodoItem]:
+        """Return cached item list (rebuilt only when items change)."""
+        return self._attr_todo_items
+
+    def _sync(self) -> bool:
+        """Apply homework changes from coordinator data; return True if changed."""
+        data = self.coordinator.data or {}
+        current = _homework_items(data.get("days") or [])
+        changed = False
+
+        for uid in [uid for uid in self._items if uid not in current]:
+            del self._items[uid]
+            del self._order[uid]
+            del self._texts[uid]
+            changed = True
+
+        for uid, (when, number, subject, text) in current.items():
+            if self._texts.get(uid) == text:
+                continue
+
+            if uid in self._completed:
+                done_hash = self._completed[uid]
+                if done_hash is None:
+                    self._completed[uid] = _text_hash(text)
+                    self._save()
+                elif done_hash != _text_hash(text):
+                    # Задание изменилось (в том числе пока HA был выключен) —
+                    # снова требует выполнения
+                    del self._completed[uid]
+                    self._save()
+
+            self._texts[uid] = text
+            self._order[uid] = (when, number)
+            self._items[uid] = TodoItem(
+                summary=subject or f"Lesson {number}",
+                uid=uid,
+                status=TodoItemStatus.COMPLETED
+                if uid in self._completed
+                else TodoItemStatus.NEEDS_ACTION,
+                due=when,
+                description=text,
+            )
+            changed = True
+
+        stale = self._completed.keys() - self._items.keys()
+        if stale and current:
+            for uid in stale:
+                del self._completed[uid]
+            self._save()
+
+        if changed:
+            self._rebuild()
+
+        return changed
+
+    def _rebuild(self) -> None:
+        self._attr_todo_items = [
+            self._items[uid]
+            for uid in sorted(self._items, key=self._order.__getitem__)
+        ]
+
+    def _save(self) -> None:
+        self._store.async_delay_save(
+            lambda: {"completed": dict(sorted(self._completed.items()))},
+            TODO_SAVE_DELAY,
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only if homework or availability changed."""
+        changed = self._sync()
+        if changed:
+            _LOGGER.debug(
+                "Homework list updated for %s: %s items",
+                self._entry.title,
+                len(self._items),
+            )
+
+        available = self.available
+        if changed or available != self._was_available:
+            self._was_available = available
+            super()._handle_coordinator_update()
+
+    async def async_update_todo_item(self, item: TodoItem) -> None:
+        """Mark homework as done or not done."""
+        if item.uid not in self._items:
+            raise HomeAssistantError(f"Homework item {item.uid} not found")
+
+        current = self._items[item.uid]
+        if item.status == current.status:
+            return
+
+        if item.status == TodoItemStatus.COMPLETED:
+            self._completed[item.uid] = _text_hash(self._texts[item.uid])
+        else:
+            self._completed.pop(item.uid, None)
+
+        self._items[item.uid] = TodoItem(
+            summary=current.summary,
+            uid=current.uid,
+            status=item.status,
+            due=current.due,
+            description=current.description,
+        )
+        self._rebuild()
+        self._save()
+        self.async_write_ha_state()
@@ -0,0 +1,268 @@
+"""Websocket API for eMaktab integration (lazy diary access)."""
+
+from __future__ import annotations
+
+import logging
+from datetime import date
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+from .const import (
+    DOMAIN,
+    SIGNAL_ENTRY_CHANGED,
+    SIGNAL_ENTRY_REMOVED,
+    WS_MAX_PAGE_SIZE,
+)
+from .coordinator import EmaktabCoordinator
+from .diary import DAY_FIELDS, iter_days, normalize_day
+
+_LOGGER = logging.getLogger(__name__)
+
+# Ровно одна цель: entry_id или person_id (Exclusive + has_at_least_one_key)
+_TARGET_SCHEMA = {
+    vol.Exclusive("entry_id", "target"): cv.string,
+    vol.Exclusive("person_id", "target"): cv.string,
+    vol.Optional("start_date"): cv.date,
+    vol.Optional("end_date"): cv.date,
+    vol.Optional("fields"): [vol.In(DAY_FIELDS)],
+}
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    """Register eMaktab websocket commands."""
+    websocket_api.async_register_command(hass, ws_get_days)
+    websocket_api.async_register_command(hass, ws_subscribe_days)
+
+
+def _find_entry_id(hass: HomeAssistant, msg: dict[str, Any]) -> str | None:
+    """Return id of the loaded entry addressed by entry_id or person_id."""
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+
+    if "entry_id" in msg:
+        return msg["entry_id"] if msg["entry_id"] in domain_data else None
+
+    if "person_id" in msg:
+        for entry in hass.config_entries.async_entries(DOMAIN):
+            if (
+                str(entry.data.get("person_id")) == msg["person_id"]
+                and entry.entry_id in domain_data
+            ):
+                return entry.entry_id
+
+    return None
+
+
+def _get_coordinator(
+    hass: HomeAssistant,
+    entry_id: str | None,
+) -> EmaktabCoordinator | None:
+    """Return coordinator of a loaded entry."""
+    data = hass.data.get(DOMAIN, {}).get(entry_id)
+    return data.get("coordinator") if data else None
+
+
+def _select_days(
+    coordinator: EmaktabCoordinator,
+    msg: dict[str, Any],
+) -> dict[str, dict[str, Any]]:
+    """Return date -> normalized day (with selected fields) for the range."""
+    start: date | None = msg.get("start_date")
+    end: date | None = msg.get("end_date")
+    fields = msg.get("fields") or DAY_FIELDS
+
+    selected: dict[str, dict[str, Any]] = {}
+    for when, day in sorted(
+        iter_days(coordinator.data or {}),
+        key=lambda item: item[0],
+    ):
+        if start is not None and when < start:
+            continue
+        if end is not None and when > end:
+            break
+
+        normalized = normalize_day(when, day)
+        selected[normalized["date"]] = {
+            "date": normalized["date"],
+            **{field: normalized[field] for field in fields},
+        }
+
+    return selected
+
+
+@websocket_api.websocket_command(
+    vol.All(
+        vol.Schema(
+            {
+                vol.Required("type"): f"{DOMAIN}/days",
+                **_TARGET_SCHEMA,
+                vol.Optional("offset", default=0): vol.All(int, vol.Range(min=0)),
+                vol.Optional("limit", default=7): vol.All(
+                    int, vol.Range(min=1, max=WS_MAX_PAGE_SIZE)
+                ),
+            }
+        ),
+        cv.has_at_least_one_key("entry_id", "person_id"),
+    )
+)
+@callback
+def ws_get_days(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return one page of normalized days of a child."""
+    coordinator = _get_coordinator(hass, _find_entry_id(hass, msg))
+    if coordinator is None:
+        connection.send_error(
+            msg["id"],
+            websocket_api.ERR_NOT_FOUND,
+            "eMaktab entry not found",
+        )
+        return
+
+    days = list(_select_days(coordinator, msg).values())
+    offset = msg["offset"]
+    page = days[offset : offset + msg["limit"]]
+    next_offset = offset + len(page)
+
+    connection.send_result(
+        msg["id"],
+        {
+            "days": page,
+            "total": len(days),
+            "offset": offset,
+            "next_offset": next_offset if next_offset < len(days) else None,
+            "last_update": (coordinator.data or {}).get("last_update"),
+        },
+    )
+
+
+@websocket_api.websocket_command(
+    vol.All(
+        vol.Schema(
+            {
+                vol.Required("type"): f"{DOMAIN}/subscribe_days",
+                **_TARGET_SCHEMA,
+            }
+        ),
+        cv.has_at_least_one_key("entry_id", "person_id"),
+    )
+)
+@callback
+def ws_subscribe_days(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Subscribe to changes of normalized days of a child.
+
+    The first event contains every day in range as "added"; later events
+    are sent only when something changed and carry just the added,
+    changed and removed days. The subscription follows the entry across
+    reloads (a new coordinator is picked up) and ends with an error when
+    the entry is deleted.
+    """
+    entry_id = _find_entry_id(hass, msg)
+    if entry_id is None:
+        connection.send_error(
+            msg["id"],
+            websocket_api.ERR_NOT_FOUND,
+            "eMaktab entry not found",
+        )
+        return
+
+    sent: dict[str, dict[str, Any]] = {}
+    initial = True
+    unsub_coordinator: CALLBACK_TYPE | None = None
+
+    @callback
+    def _forward(coordinator: EmaktabCoordinator) -> None:
+        nonlocal initial
+        current = _select_days(coordinator, msg)
+
+        added = [day for key, day in current.items() if key not in sent]
+        changed = [
+            day
+            for key, day in current.items()
+            if key in sent and sent[key] != day
+        ]
+        removed = [key for key in sent if key not in current]
+
+        if not (added or changed or removed or initial):
+            return
+
+        initial = False
+        sent.clear()
+        sent.update(current)
+
+        connection.send_message(
+            websocket_api.event_message(
+                msg["id"],
+                {
+                    "added": added,
+                    "changed": changed,
+                    "removed": removed,
+                    "last_update": (coordinator.data or {}).get("last_update"),
+                },
+            )
+        )
+
+    @callback
+    def _attach() -> None:
+        """(Re)bind to the current coordinator of the entry."""
+        nonlocal unsub_coordinator
+        if unsub_coordinator is not None:
+            unsub_coordinator()
+            unsub_coordinator = None
+
+        coordinator = _get_coordinator(hass, entry_id)
+        if coordinator is None:
+            return  # запись выгружена — ждём повторной загрузки
+
+        unsub_coordinator = coordinator.async_add_listener(
+            lambda: _forward(coordinator)
+        )
+        _forward(coordinator)
+
+    @callback
+    def _entry_changed(changed_entry_id: str) -> None:
+        if changed_entry_id == entry_id:
+            _attach()
+
+    @callback
+    def _entry_removed(removed_entry_id: str) -> None:
+        if removed_entry_id != entry_id:
+            return
+        _unsubscribe()
+        connection.subscriptions.pop(msg["id"], None)
+        connection.send_error(
+            msg["id"],
+            websocket_api.ERR_NOT_FOUND,
+            "eMaktab entry removed",
+        )
+
+    unsub_signals = [
+        async_dispatcher_connect(hass, SIGNAL_ENTRY_CHANGED, _entry_changed),
+        async_dispatcher_connect(hass, SIGNAL_ENTRY_REMOVED, _entry_removed),
+    ]
+
+    @callback
+    def _unsubscribe() -> None:
+        nonlocal unsub_coordinator
+        for unsub in unsub_signals:
+            unsub()
+        unsub_signals.clear()
+        if unsub_coordinator is not None:
+            unsub_coordinator()
+            unsub_coordinator = None
+
+    connection.subscriptions[msg["id"]] = _unsubscribe
+    connection.send_result(msg["id"])
+    _attach()